@@ -1,28 +1,52 @@
+import time
 import typer
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 from loguru import logger
 from rich.console import Console
 from rich.panel import Panel
 import depthai as dai
 from src.core.recorder import OakDCamera
 from src.core.detector import OakDObjectDetectionApp
+from src.core.batch import BatchProcessor, OPERATIONS
+from src.core.soak import SoakRunner, TARGETS
+from src.core.offline import OfflineDetectionApp
+from src.core.daemon import DaemonClient, DeviceDaemon
+from src.core.autotune import AutoTuner
 from src.utils.config import ConfigManager
 from src.utils.device import check_connection_status
 from src.utils.visualization import show_video_stream
+from src.utils.video_writer import benchmark_writers
+from src.utils.synthetic import SyntheticDevice, SyntheticFrameSource
 
 app = typer.Typer()
 console = Console()
 
+DEFAULT_SOCKET_PATH = Path(ConfigManager.DEFAULT_CONFIG["daemon"]["socket_path"])
+
 @app.command()
-def check_connection():
+def check_connection(
+    use_daemon: bool = typer.Option(
+        False,
+        "--daemon", "-D",
+        help="Query the running device daemon instead of booting the device"
+    ),
+    socket_path: Path = typer.Option(
+        DEFAULT_SOCKET_PATH,
+        "--socket",
+        help="Unix socket of the device daemon"
+    ),
+):
     """
     Check connection to OAK-D device and print device details.
     """
     console.print(Panel.fit("OAK-D Connection Check", style="bold cyan"))
     
     try:
-        info = check_connection_status()
+        if use_daemon:
+            info = DaemonClient(socket_path).request("status")["device"]
+        else:
+            info = check_connection_status()
         console.print("[bold green]Connected to device![/bold green]")
         console.print(f"Device name: {info['device_name']}")
         console.print(f"USB speed: {info['usb_speed']}")
@@ -35,14 +59,21 @@ def check_connection():
         raise typer.Exit(code=1)
 
 @app.command()
-def show_video():
+def show_video(
+    config_file: Optional[Path] = typer.Option(
+        None,
+        "--config",
+        help="Path to YAML config file (for the 'preview' pipeline spec)"
+    ),
+) -> None:
     """
     Stream and display RGB and Depth video from OAK-D camera.
     """
     console.print(Panel.fit("OAK-D Video Stream", style="bold blue"))
     
     try:
-        show_video_stream()
+        config = ConfigManager.load_config(str(config_file) if config_file else None)
+        show_video_stream(config)
     except Exception as e:
         console.print(f"[bold red]Error during video streaming:[/bold red] {e}")
         logger.exception("Video streaming failed")
@@ -70,6 +101,21 @@ def record(
         "--config", "-c",
         help="Path to YAML config file. Overrides other options if provided."
     ),
+    overlays: Optional[List[Path]] = typer.Option(
+        None,
+        "--overlay",
+        help="Config overlay applied on top, e.g. written by autotune (repeatable)"
+    ),
+    use_daemon: bool = typer.Option(
+        False,
+        "--daemon", "-D",
+        help="Record through the running device daemon (uses the daemon's fps, resolution and output location)"
+    ),
+    socket_path: Path = typer.Option(
+        DEFAULT_SOCKET_PATH,
+        "--socket",
+        help="Unix socket of the device daemon"
+    ),
 ) -> None:
     """
     Record RGB and Depth video from OAK-D camera.
@@ -81,18 +127,31 @@ def record(
             if not config_file.exists():
                 console.print(f"[red]Config file not found: {config_file}[/red]")
                 raise typer.Exit(code=1)
-            config = ConfigManager.load_config(str(config_file))
+            config = ConfigManager.load_config(str(config_file), overlay_paths=[str(p) for p in overlays or []])
         else:
-            config = ConfigManager.create_config_from_args(output_dir, duration, fps)
+            config = ConfigManager.create_config_from_args(
+                output_dir, duration, fps, overlay_paths=[str(p) for p in overlays or []]
+            )
 
-        logger.info(f"Initializing camera with config: {config}")
-        recorder = OakDCamera(config)
-        
-        with console.status(f"[bold green]Recording for {config['camera']['recording_time']} seconds..."):
-            recorder.record()
+        if use_daemon:
+            client = DaemonClient(socket_path)
+            # The daemon picks a session directory under its own output root
+            recording = client.request("start_recording", duration=config['camera']['recording_time'])
+            with console.status(f"[bold green]Recording for {config['camera']['recording_time']} seconds via daemon..."):
+                # Wait on this recording only, not whatever the daemon is doing
+                while client.request("recording", session_id=recording["session_id"])["state"] == "recording":
+                    time.sleep(0.2)
+            output_path = recording["output_path"]
+        else:
+            logger.info(f"Initializing camera with config: {config}")
+            recorder = OakDCamera(config)
+            
+            with console.status(f"[bold green]Recording for {config['camera']['recording_time']} seconds..."):
+                recorder.record()
+            output_path = config['output']['base_path']
             
         console.print("[bold green]Recording finished successfully![/bold green]")
-        console.print(f"Files saved to: {Path(config['output']['base_path']).resolve()}")
+        console.print(f"Files saved to: {Path(output_path).resolve()}")
 
     except Exception as e:
         console.print(f"[bold red]Error during recording:[/bold red] {e}")
@@ -106,16 +165,31 @@ def detect(
         "--output-dir", "-o",
         help="Directory to save video (if enabled)"
     ),
-    confidence: float = typer.Option(
-        0.5,
+    confidence: Optional[float] = typer.Option(
+        None,
         "--confidence", "-c",
-        help="Confidence threshold for detection"
+        help="Confidence threshold for detection (overrides detection.confidence_threshold)"
     ),
     save_video: bool = typer.Option(
         False,
         "--save-video", "-s",
         help="Save video of the detection"
     ),
+    roi_capture: bool = typer.Option(
+        False,
+        "--roi-capture", "-r",
+        help="Archive full-resolution crops of detected objects"
+    ),
+    config_file: Optional[Path] = typer.Option(
+        None,
+        "--config",
+        help="Path to YAML config file (detection, pipelines and analytics settings)"
+    ),
+    overlays: Optional[List[Path]] = typer.Option(
+        None,
+        "--overlay",
+        help="Config overlay applied on top, e.g. written by autotune (repeatable)"
+    ),
 ) -> None:
     """
     Run object detection on OAK-D camera.
@@ -129,17 +203,404 @@ def detect(
     video_path = output_dir / "object_detection.mp4" if save_video else None
 
     try:
-        logger.info(f"Starting detection with confidence {confidence}")
+        config = ConfigManager.load_config(
+            str(config_file) if config_file else None, overlay_paths=[str(p) for p in overlays or []]
+        )
+        if confidence is not None:
+            config["detection"]["confidence_threshold"] = confidence
+        logger.info(f"Starting detection with confidence {config['detection']['confidence_threshold']}")
+        config["output"]["base_path"] = str(output_dir)
+        if roi_capture:
+            config["roi_capture"]["enabled"] = True
         app = OakDObjectDetectionApp(
-            confidence_threshold=confidence,
             save_video=save_video,
-            output_path=str(video_path) if video_path else None
+            output_path=str(video_path) if video_path else None,
+            config=config
         )
         app.run()
+        if app.roi_archive is not None:
+            console.print(f"Object crops saved to: {Path(app.roi_archive.path).resolve()}")
     except Exception as e:
         console.print(f"[bold red]Error during detection:[/bold red] {e}")
         logger.exception("Detection failed")
         raise typer.Exit(code=1)
 
+@app.command()
+def detect_offline(
+    input_path: Path = typer.Argument(
+        ...,
+        help="Recorded RGB video, or a directory of recorded sessions"
+    ),
+    model: Optional[Path] = typer.Option(
+        None,
+        "--model", "-m",
+        help="CPU export of mobilenet-ssd (overrides offline_detection.model_path)"
+    ),
+    confidence: Optional[float] = typer.Option(
+        None,
+        "--confidence",
+        help="Confidence threshold for detection"
+    ),
+    batch_size: Optional[int] = typer.Option(
+        None,
+        "--batch-size", "-b",
+        help="Frames per inference batch"
+    ),
+    workers: Optional[int] = typer.Option(
+        None,
+        "--workers", "-w",
+        help="Inference threads (0 uses one per core)"
+    ),
+    config_file: Optional[Path] = typer.Option(
+        None,
+        "--config", "-c",
+        help="Path to YAML config file"
+    ),
+) -> None:
+    """
+    Re-run object detection on recorded video using the CPU.
+    """
+    console.print(Panel.fit("OAK-D Offline Detection", style="bold green"))
+
+    try:
+        config = ConfigManager.load_config(str(config_file) if config_file else None)
+        offline_config = config["offline_detection"]
+        if model:
+            offline_config["model_path"] = str(model)
+        if confidence is not None:
+            offline_config["confidence_threshold"] = confidence
+        if batch_size is not None:
+            offline_config["batch_size"] = batch_size
+        if workers is not None:
+            offline_config["workers"] = workers
+        config["output"]["base_path"] = str(input_path if input_path.is_dir() else input_path.parent)
+
+        detector = OfflineDetectionApp(config)
+        with console.status(f"[bold green]Detecting with {detector.workers} worker(s)..."):
+            stats = detector.run_offline(input_path)
+
+        console.print(f"[bold green]Processed {stats['frames']} frames from {stats['videos']} video(s)[/bold green]")
+        console.print(f"Throughput: {stats['fps']:.1f} frames/sec over {stats['seconds']:.1f}s")
+        for video in stats["failed"]:
+            console.print(f"[yellow]Skipped unreadable video: {video}[/yellow]")
+
+    except Exception as e:
+        console.print(f"[bold red]Error during offline detection:[/bold red] {e}")
+        logger.exception("Offline detection failed")
+        raise typer.Exit(code=1)
+
+@app.command()
+def process(
+    output_dir: Path = typer.Option(
+        Path("./output"),
+        "--output-dir", "-o",
+        help="Directory to scan for recorded sessions"
+    ),
+    operation: str = typer.Option(
+        "colorize",
+        "--operation", "-p",
+        help=f"Post-processing to apply: {', '.join(OPERATIONS)}"
+    ),
+    colormap: Optional[str] = typer.Option(
+        None,
+        "--colormap", "-m",
+        help="OpenCV colormap for re-colorized depth (e.g. COLORMAP_TURBO)"
+    ),
+    workers: int = typer.Option(
+        0,
+        "--workers", "-w",
+        help="Number of worker processes (0 uses the config value or one per core)"
+    ),
+    chunk_frames: Optional[int] = typer.Option(
+        None,
+        "--chunk-frames",
+        help="Split sessions into chunks of this many frames (0 disables chunking)"
+    ),
+    restart: bool = typer.Option(
+        False,
+        "--restart",
+        help="Ignore progress saved by an interrupted run"
+    ),
+    config_file: Optional[Path] = typer.Option(
+        None,
+        "--config", "-c",
+        help="Path to YAML config file"
+    ),
+) -> None:
+    """
+    Post-process recorded sessions in parallel.
+    """
+    console.print(Panel.fit("OAK-D Batch Processing", style="bold yellow"))
+
+    try:
+        if config_file and not config_file.exists():
+            console.print(f"[red]Config file not found: {config_file}[/red]")
+            raise typer.Exit(code=1)
+        config = ConfigManager.load_config(str(config_file) if config_file else None)
+        if colormap:
+            config["depth"]["colormap"] = colormap
+        if chunk_frames is not None:
+            config["process"]["chunk_frames"] = chunk_frames
+
+        processor = BatchProcessor(output_dir, config, operation, workers=workers, restart=restart)
+        with console.status(f"[bold green]Processing sessions with {processor.workers} worker(s)..."):
+            stats = processor.run()
+
+        console.print(f"[bold green]Processed {stats['frames']} frames from {stats['sessions']} session(s)[/bold green]")
+        console.print(f"Throughput: {stats['fps']:.1f} frames/sec over {stats['seconds']:.1f}s (including {stats['merge_seconds']:.1f}s merging)")
+        for output in stats["outputs"]:
+            console.print(f"  {output}")
+
+    except typer.Exit:
+        raise
+    except Exception as e:
+        console.print(f"[bold red]Error during processing:[/bold red] {e}")
+        logger.exception("Batch processing failed")
+        raise typer.Exit(code=1)
+
+@app.command()
+def soak(
+    target: str = typer.Option(
+        "record",
+        "--target", "-t",
+        help=f"Component to soak: {', '.join(TARGETS)}"
+    ),
+    duration: float = typer.Option(
+        3600,
+        "--duration", "-d",
+        help="Soak duration in seconds"
+    ),
+    sample_interval: float = typer.Option(
+        10,
+        "--sample-interval", "-i",
+        help="Seconds between resource samples"
+    ),
+    fps: int = typer.Option(
+        0,
+        "--fps", "-f",
+        help="Synthetic source frame rate (0 runs as fast as possible)"
+    ),
+    report: Path = typer.Option(
+        Path("./reports/soak_report.json"),
+        "--report", "-r",
+        help="Where to write the JSON report"
+    ),
+    save_video: bool = typer.Option(
+        False,
+        "--save-video", "-s",
+        help="Also encode detection video when soaking 'detect'"
+    ),
+    strict: bool = typer.Option(
+        False,
+        "--strict",
+        help="Exit with an error if any stability issue is flagged"
+    ),
+    config_file: Optional[Path] = typer.Option(
+        None,
+        "--config", "-c",
+        help="Path to YAML config file"
+    ),
+) -> None:
+    """
+    Soak-test recording or detection against a synthetic frame source.
+    """
+    console.print(Panel.fit("OAK-D Soak Test", style="bold red"))
+
+    try:
+        config = ConfigManager.load_config(str(config_file) if config_file else None)
+        runner = SoakRunner(target, config, duration, sample_interval=sample_interval, fps=fps, save_video=save_video)
+        with console.status(f"[bold green]Soaking '{target}' for {duration:.0f} seconds..."):
+            result = runner.run()
+        SoakRunner.write_report(result, str(report))
+    except Exception as e:
+        console.print(f"[bold red]Error during soak test:[/bold red] {e}")
+        logger.exception("Soak test failed")
+        raise typer.Exit(code=1)
+
+    summary = result["summary"]
+    console.print(f"Frames processed: {result['frames']}")
+    if "fps_early" in summary:
+        console.print(f"Throughput: {summary['fps_early']:.1f} -> {summary['fps_late']:.1f} fps")
+        console.print(f"RSS: {summary['rss_start_mb']:.1f} -> {summary['rss_end_mb']:.1f} MiB")
+    if summary["flags"]:
+        console.print(f"[bold yellow]Flagged:[/bold yellow] {', '.join(summary['flags'])}")
+        if strict:
+            raise typer.Exit(code=1)
+    else:
+        console.print("[bold green]No stability issues flagged[/bold green]")
+    console.print(f"Report saved to: {report}")
+
+@app.command()
+def daemon(
+    socket_path: Path = typer.Option(
+        DEFAULT_SOCKET_PATH,
+        "--socket",
+        help="Unix socket to listen on"
+    ),
+    synthetic: bool = typer.Option(
+        False,
+        "--synthetic",
+        help="Serve a synthetic frame source instead of a real device"
+    ),
+    fps: int = typer.Option(
+        30,
+        "--fps", "-f",
+        help="Frame rate of the synthetic source"
+    ),
+    stop: bool = typer.Option(
+        False,
+        "--stop",
+        help="Shut down the running daemon"
+    ),
+    config_file: Optional[Path] = typer.Option(
+        None,
+        "--config", "-c",
+        help="Path to YAML config file"
+    ),
+    overlays: Optional[List[Path]] = typer.Option(
+        None,
+        "--overlay",
+        help="Config overlay applied on top, e.g. written by autotune (repeatable)"
+    ),
+) -> None:
+    """
+    Keep the device booted and serve CLI requests over a Unix socket.
+    """
+    if stop:
+        try:
+            DaemonClient(socket_path).request("shutdown")
+            console.print("[bold green]Daemon stopped[/bold green]")
+        except Exception as e:
+            console.print(f"[bold red]Failed to stop daemon:[/bold red] {e}")
+            raise typer.Exit(code=1)
+        return
+
+    console.print(Panel.fit("OAK-D Device Daemon", style="bold magenta"))
+
+    try:
+        config = ConfigManager.load_config(
+            str(config_file) if config_file else None, overlay_paths=[str(p) for p in overlays or []]
+        )
+        device_factory = None
+        if synthetic:
+            source = SyntheticFrameSource(rgb_size=config["camera"]["rgb_resolution"])
+            device_factory = lambda pipeline: SyntheticDevice(pipeline, source=source, fps=fps)
+        console.print(f"Listening on {socket_path} (Ctrl+C to stop)")
+        DeviceDaemon(config, socket_path, device_factory=device_factory).serve_forever()
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        console.print(f"[bold red]Daemon error:[/bold red] {e}")
+        logger.exception("Daemon failed")
+        raise typer.Exit(code=1)
+
+@app.command()
+def autotune(
+    target: str = typer.Option(
+        "record",
+        "--target", "-t",
+        help="Host pipeline to tune: record or detect"
+    ),
+    session: Optional[Path] = typer.Option(
+        None,
+        "--session", "-s",
+        help="Recorded session directory to replay (synthetic frames if omitted)"
+    ),
+    duration: Optional[float] = typer.Option(
+        None,
+        "--duration", "-d",
+        help="Seconds per trial (overrides autotune.duration)"
+    ),
+    overlay: Path = typer.Option(
+        Path("./autotune.yml"),
+        "--overlay", "-o",
+        help="Where to write the best configuration as a config overlay"
+    ),
+    report: Path = typer.Option(
+        Path("./reports/autotune_report.json"),
+        "--report", "-r",
+        help="Where to write the JSON report of all trials"
+    ),
+    config_file: Optional[Path] = typer.Option(
+        None,
+        "--config", "-c",
+        help="Path to YAML config file (its autotune.grid defines the search)"
+    ),
+) -> None:
+    """
+    Find the throughput-optimal host configuration by replaying frames over a parameter grid.
+    """
+    console.print(Panel.fit("OAK-D Autotune", style="bold blue"))
+
+    try:
+        config = ConfigManager.load_config(str(config_file) if config_file else None)
+        tuner = AutoTuner(config, target=target, duration=duration, session=session)
+        with console.status("[bold green]Running trials..."):
+            result = tuner.run()
+        AutoTuner.write_report(result, str(report))
+        AutoTuner.write_overlay(result["best"], str(overlay))
+    except Exception as e:
+        console.print(f"[bold red]Error during autotune:[/bold red] {e}")
+        logger.exception("Autotune failed")
+        raise typer.Exit(code=1)
+
+    console.print(f"Pareto-optimal configurations: {len(result['pareto_front'])} of {len(result['results'])}")
+    for trial in result["pareto_front"]:
+        marker = "*" if trial is result["best"] else " "
+        console.print(
+            f"{marker} {trial['params']}: {trial['fps']:.1f} fps, dropped {trial['drop_rate']:.0%}, "
+            f"p95 {trial['latency_p95_ms']:.1f} ms, CPU {trial['cpu_percent']:.0f}%"
+        )
+    console.print(f"[bold green]Best configuration written to {overlay}[/bold green]")
+
+@app.command()
+def benchmark_writer(
+    frames: int = typer.Option(
+        300,
+        "--frames", "-n",
+        help="Number of synthetic frames to encode per writer"
+    ),
+    config_file: Optional[Path] = typer.Option(
+        None,
+        "--config", "-c",
+        help="Path to YAML config file"
+    ),
+) -> None:
+    """
+    Compare encode speed and output size of the video writer backends.
+    """
+    console.print(Panel.fit("OAK-D Writer Benchmark", style="bold cyan"))
+
+    config = ConfigManager.load_config(str(config_file) if config_file else None)
+    ffmpeg_config = config["writer"]["ffmpeg"]
+    writer_configs = {
+        "opencv-mp4v": {"backend": "opencv", "fourcc": "mp4v"},
+        "configured": config["writer"],
+        "ffmpeg-libx264": {"backend": "ffmpeg", "ffmpeg": {**ffmpeg_config, "codec": "libx264"}},
+        "ffmpeg-libx265": {"backend": "ffmpeg", "ffmpeg": {**ffmpeg_config, "codec": "libx265"}},
+    }
+
+    # Pre-generate frames so only encoding is timed
+    source = SyntheticFrameSource(rgb_size=config["camera"]["rgb_resolution"])
+    test_frames = []
+    for _ in range(frames):
+        source.advance()
+        test_frames.append(source.next_rgb().getCvFrame())
+
+    try:
+        with console.status(f"[bold green]Encoding {frames} frames per writer..."):
+            results = benchmark_writers(writer_configs, test_frames, config["camera"]["fps"])
+    except Exception as e:
+        console.print(f"[bold red]Error during benchmark:[/bold red] {e}")
+        logger.exception("Writer benchmark failed")
+        raise typer.Exit(code=1)
+
+    baseline = next((r for r in results if r["name"] == "opencv-mp4v"), None)
+    for result in results:
+        line = f"{result['name']:<16} {result['fps']:8.1f} fps  {result['bytes'] / 2**20:8.2f} MiB"
+        if baseline and baseline["bytes"]:
+            line += f"  ({result['bytes'] / baseline['bytes']:.0%} of mp4v size)"
+        console.print(line)
+
 if __name__ == "__main__":
     app()
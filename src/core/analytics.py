@@ -0,0 +1,158 @@
+import json
+import math
+import os
+import time
+
+import numpy as np
+from loguru import logger
+
+
+class WindowedCounter:
+    """
+    Sliding-window aggregates over a ring of fixed-width time buckets.
+
+    Each detection touches a single bucket, so updates are O(1). Expired
+    buckets are subtracted from the running totals as the window advances,
+    and memory is fixed by the bucket count regardless of uptime.
+    """
+    def __init__(self, window_seconds, n_classes, buckets=60):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = window_seconds / buckets
+        self.n_buckets = buckets
+
+        self.class_counts = np.zeros((buckets, n_classes), dtype=np.int64)
+        self.frames = np.zeros(buckets, dtype=np.int64)
+        self.occupied = np.zeros(buckets, dtype=np.int64)
+        self.objects = np.zeros(buckets, dtype=np.int64)
+        self.nearest = np.full(buckets, np.inf)
+
+        self.total_class_counts = np.zeros(n_classes, dtype=np.int64)
+        self.total_frames = 0
+        self.total_occupied = 0
+        self.total_objects = 0
+
+        self._bucket = None
+
+    def _advance(self, now):
+        """
+        Move the head of the ring to the bucket containing now, expiring any
+        buckets that fell out of the window
+        """
+        bucket = int(now // self.bucket_seconds)
+        if self._bucket is None:
+            self._bucket = bucket
+            return bucket % self.n_buckets
+        for expired in range(self._bucket + 1, self._bucket + 1 + min(bucket - self._bucket, self.n_buckets)):
+            slot = expired % self.n_buckets
+            self.total_class_counts -= self.class_counts[slot]
+            self.total_frames -= self.frames[slot]
+            self.total_occupied -= self.occupied[slot]
+            self.total_objects -= self.objects[slot]
+            self.class_counts[slot] = 0
+            self.frames[slot] = 0
+            self.occupied[slot] = 0
+            self.objects[slot] = 0
+            self.nearest[slot] = np.inf
+        self._bucket = max(self._bucket, bucket)
+        return self._bucket % self.n_buckets
+
+    def add_frame(self, now, labels, distances):
+        """
+        Account for one detection result covering a single frame
+        """
+        slot = self._advance(now)
+        self.frames[slot] += 1
+        self.total_frames += 1
+        if labels:
+            self.occupied[slot] += 1
+            self.total_occupied += 1
+        for label in labels:
+            self.class_counts[slot, label] += 1
+            self.total_class_counts[label] += 1
+        self.objects[slot] += len(labels)
+        self.total_objects += len(labels)
+        for distance in distances:
+            if distance < self.nearest[slot]:
+                self.nearest[slot] = distance
+
+    def snapshot(self, now, labels):
+        """
+        Return the aggregates for the window ending at now
+        """
+        self._advance(now)
+        nearest = float(self.nearest.min())
+        frames = self.total_frames
+        return {
+            "window_seconds": self.window_seconds,
+            "frames": int(frames),
+            "counts": {labels[i]: int(n) for i, n in enumerate(self.total_class_counts) if n},
+            "occupancy": self.total_occupied / frames if frames else 0.0,
+            "mean_objects": self.total_objects / frames if frames else 0.0,
+            "nearest_m": nearest if math.isfinite(nearest) else None,
+        }
+
+
+class DetectionAnalytics:
+    """
+    Live per-class counts, occupancy and nearest-object distance over several
+    sliding windows, fed from the detection stream
+    """
+    def __init__(self, labels, windows=(10, 60, 3600), buckets=60, clock=time.monotonic):
+        self.labels = labels
+        self.clock = clock
+        self.windows = {
+            self.window_name(seconds): WindowedCounter(seconds, len(labels), buckets)
+            for seconds in windows
+        }
+
+    @staticmethod
+    def window_name(seconds):
+        if seconds % 3600 == 0:
+            return f"{seconds // 3600}h"
+        if seconds % 60 == 0:
+            return f"{seconds // 60}m"
+        return f"{seconds}s"
+
+    def update(self, detections, now=None):
+        """
+        Add one frame's detections to every window
+        """
+        now = self.clock() if now is None else now
+        labels = [d.label for d in detections]
+        # Spatial z is in millimetres; 0 means no valid depth for the box
+        distances = [d.spatialCoordinates.z / 1000 for d in detections if d.spatialCoordinates.z > 0]
+        for window in self.windows.values():
+            window.add_frame(now, labels, distances)
+
+    def snapshot(self, now=None):
+        """
+        Return the current aggregates for every window
+        """
+        now = self.clock() if now is None else now
+        return {name: window.snapshot(now, self.labels) for name, window in self.windows.items()}
+
+    def summary_lines(self, snapshot=None):
+        """
+        Format a snapshot as short lines for on-frame display
+        """
+        snapshot = snapshot or self.snapshot()
+        lines = []
+        for name, stats in snapshot.items():
+            top = sorted(stats["counts"].items(), key=lambda kv: -kv[1])[:2]
+            counts = ", ".join(f"{label} {n}" for label, n in top) or "none"
+            nearest = f"{stats['nearest_m']:.2f}m" if stats["nearest_m"] is not None else "-"
+            lines.append(f"{name}: {counts} | occ {stats['occupancy']:.0%} | near {nearest}")
+        return lines
+
+    def write_metrics(self, path, snapshot=None):
+        """
+        Atomically write a snapshot as JSON for external scrapers
+        """
+        snapshot = snapshot or self.snapshot()
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({"timestamp": time.time(), "windows": snapshot}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Failed to write analytics metrics to {path}: {e}")
@@ -0,0 +1,286 @@
+import copy
+import itertools
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import cv2
+import numpy as np
+import yaml
+from loguru import logger
+
+from .batch import SessionProcessor
+from .detector import OakDObjectDetectionApp
+from .recorder import OakDCamera
+from src.utils.synthetic import SyntheticDetections, SyntheticFrameSource, SyntheticImgFrame
+
+TARGETS = ("record", "detect")
+# Trials are compared on delivered throughput, frames dropped, latency and CPU use
+OBJECTIVES = (("fps", max), ("drop_rate", min), ("latency_p95_ms", min), ("cpu_percent", min))
+
+
+def set_path(config, dotted_key, value):
+    """
+    Set a nested config value addressed as 'section.key'
+    """
+    keys = dotted_key.split(".")
+    node = config
+    for key in keys[:-1]:
+        node = node.setdefault(key, {})
+    node[keys[-1]] = value
+
+
+def expand_grid(grid):
+    """
+    Expand {'section.key': [values...]} into a list of {'section.key': value} trials
+    """
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def pareto_front(results, objectives=(("fps", max), ("latency_p95_ms", min), ("cpu_percent", min))):
+    """
+    Results not dominated by any other result on the given objectives
+    """
+    def better_or_equal(a, b):
+        return all((a[k] >= b[k]) if sense is max else (a[k] <= b[k]) for k, sense in objectives)
+
+    def strictly_better(a, b):
+        return any((a[k] > b[k]) if sense is max else (a[k] < b[k]) for k, sense in objectives)
+
+    return [
+        r for r in results
+        if not any(better_or_equal(o, r) and strictly_better(o, r) for o in results if o is not r)
+    ]
+
+
+def load_replay_frames(session=None, count=60, rgb_size=(1280, 800), depth_size=(640, 400), config=None):
+    """
+    Load a pool of RGB and depth frames to replay: decoded from a recorded
+    session when given, otherwise generated synthetically. Frames are kept in
+    memory so decoding is not part of the measurement.
+    """
+    if session is None:
+        source = SyntheticFrameSource(rgb_size=rgb_size, depth_size=depth_size)
+        frames = []
+        for _ in range(count):
+            source.advance()
+            frames.append((source.next_rgb().getCvFrame(), source.next_depth().getFrame()))
+        return frames
+
+    session = Path(session)
+    decolorize = SessionProcessor(config).decolorize
+    rgb_capture = cv2.VideoCapture(str(session / config["output"]["rgb_filename"]))
+    depth_capture = cv2.VideoCapture(str(session / config["output"]["depth_filename"]))
+    frames = []
+    try:
+        while len(frames) < count:
+            ok_rgb, rgb_frame = rgb_capture.read()
+            ok_depth, depth_frame = depth_capture.read()
+            if not (ok_rgb and ok_depth):
+                break
+            # Recorded depth is colorized; invert the colormap to replay it as raw depth
+            depth_frame = cv2.resize(decolorize(depth_frame), tuple(depth_size))
+            frames.append((cv2.resize(rgb_frame, tuple(rgb_size)), depth_frame))
+    finally:
+        rgb_capture.release()
+        depth_capture.release()
+    if not frames:
+        raise ValueError(f"No frames could be read from session {session}")
+    return frames
+
+
+class ReplayTrial:
+    """
+    Replay frames into the host pipeline at the configured camera rate through
+    a bounded, drop-oldest queue (like a non-blocking device output queue) and
+    measure sustained throughput, queue-to-output latency and CPU use
+    """
+    def __init__(self, target, config, frames, duration):
+        self.target = target
+        self.config = config
+        self.frames = frames
+        self.duration = duration
+
+    def _build(self, output_dir):
+        self.config["output"]["base_path"] = output_dir
+        if self.target == "record":
+            app = OakDCamera(self.config)
+            return app, app.process_frames
+
+        app = OakDObjectDetectionApp(
+            preview_size=tuple(self.config.get("detection", {}).get("preview_size", (304, 304))),
+            save_video=True,
+            output_path=os.path.join(output_dir, "object_detection.mp4"),
+            config=self.config,
+            build_pipeline=False
+        )
+        return app, app.process_packets
+
+    def _produce(self, packets, stop, counters):
+        period = 1.0 / self.config["camera"]["fps"]
+        detections = SyntheticFrameSource(seed=1)
+        next_time = time.perf_counter()
+        index = 0
+        while not stop.is_set():
+            rgb_frame, depth_frame = self.frames[index % len(self.frames)]
+            timestamp = timedelta(seconds=time.monotonic())
+            rgb = SyntheticImgFrame(rgb_frame.copy(), index, timestamp)
+            if self.target == "record":
+                second = SyntheticImgFrame(depth_frame, index, timestamp)
+            else:
+                second = SyntheticDetections(detections.next_detections().detections, index, timestamp)
+
+            item = (time.perf_counter(), rgb, second)
+            try:
+                packets.put_nowait(item)
+            except queue.Full:
+                # Non-blocking device queues drop the oldest message
+                try:
+                    packets.get_nowait()
+                    counters["dropped"] += 1
+                except queue.Empty:
+                    pass
+                packets.put_nowait(item)
+            counters["produced"] += 1
+            index += 1
+
+            next_time += period
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                stop.wait(delay)
+
+    def run(self):
+        with tempfile.TemporaryDirectory(prefix="oakd-autotune-") as output_dir:
+            app, step = self._build(output_dir)
+            packets = queue.Queue(maxsize=max(1, self.config["camera"]["queue_size"]))
+            counters = {"produced": 0, "dropped": 0}
+            stop = threading.Event()
+            producer = threading.Thread(target=self._produce, args=(packets, stop, counters), daemon=True)
+
+            latencies = []
+            cpu_started = time.process_time()
+            wall_started = time.perf_counter()
+            producer.start()
+            try:
+                while time.perf_counter() - wall_started < self.duration:
+                    try:
+                        enqueued, first, second = packets.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                    step(first, second)
+                    latencies.append(time.perf_counter() - enqueued)
+            finally:
+                stop.set()
+                producer.join()
+                elapsed = time.perf_counter() - wall_started
+                cpu = time.process_time() - cpu_started
+                app.cleanup(display=False)
+
+        latencies_ms = np.asarray(latencies or [0.0]) * 1000
+        return {
+            "frames": len(latencies),
+            "dropped": counters["dropped"],
+            "drop_rate": counters["dropped"] / counters["produced"] if counters["produced"] else 0.0,
+            "fps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+            "latency_p50_ms": float(np.percentile(latencies_ms, 50)),
+            "latency_p95_ms": float(np.percentile(latencies_ms, 95)),
+            "latency_p99_ms": float(np.percentile(latencies_ms, 99)),
+            "cpu_percent": 100.0 * cpu / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+class AutoTuner:
+    """
+    Run the host pipeline over a parameter grid against replayed frames and
+    pick the throughput-optimal configuration from the Pareto front
+    """
+    def __init__(self, config, target="record", grid=None, duration=None, session=None):
+        if target not in TARGETS:
+            raise ValueError(f"Unknown autotune target '{target}', expected one of {', '.join(TARGETS)}")
+        self.config = copy.deepcopy(config)
+        autotune_config = self.config["autotune"]
+        self.target = target
+        self.grid = grid or autotune_config["grid"]
+        self.duration = duration or autotune_config["duration"]
+        self.replay_frames = autotune_config["replay_frames"]
+        self.max_drop_rate = autotune_config.get("max_drop_rate", 0.01)
+        self.session = session
+        self._frame_pools = {}
+
+    def _frames_for(self, config):
+        if self.target == "record":
+            rgb_size = tuple(config["camera"]["rgb_resolution"])
+        else:
+            rgb_size = tuple(config.get("detection", {}).get("preview_size", (304, 304)))
+        if rgb_size not in self._frame_pools:
+            self._frame_pools[rgb_size] = load_replay_frames(
+                self.session, self.replay_frames, rgb_size=rgb_size, config=self.config
+            )
+        return self._frame_pools[rgb_size]
+
+    def run(self):
+        """
+        Run every trial and return results, the Pareto front and the best trial
+        """
+        trials = expand_grid(self.grid)
+        logger.info(f"Autotuning '{self.target}' over {len(trials)} configuration(s), {self.duration}s each")
+
+        results = []
+        for i, params in enumerate(trials, 1):
+            config = copy.deepcopy(self.config)
+            for key, value in params.items():
+                set_path(config, key, value)
+            metrics = ReplayTrial(self.target, config, self._frames_for(config), self.duration).run()
+            results.append({"params": params, **metrics})
+            logger.info(
+                f"[{i}/{len(trials)}] {params}: {metrics['fps']:.1f} fps, "
+                f"p95 {metrics['latency_p95_ms']:.1f} ms, CPU {metrics['cpu_percent']:.0f}%, "
+                f"dropped {metrics['drop_rate']:.0%}"
+            )
+
+        front = pareto_front(results, OBJECTIVES)
+        best = self.select_best(front)
+        return {"target": self.target, "results": results, "pareto_front": front, "best": best}
+
+    def select_best(self, results):
+        """
+        Throughput-optimal trial: the highest delivered fps among trials that
+        kept up (drop rate within max_drop_rate), or among all trials if none
+        did; within 2% of that, prefer fewer drops, lower latency, then lower CPU
+        """
+        candidates = [r for r in results if r["drop_rate"] <= self.max_drop_rate] or results
+        top = max(r["fps"] for r in candidates)
+        return min(
+            (r for r in candidates if r["fps"] >= 0.98 * top),
+            key=lambda r: (r["drop_rate"], r["latency_p95_ms"], r["cpu_percent"])
+        )
+
+    @staticmethod
+    def write_overlay(best, path):
+        """
+        Write the best parameters as a config overlay for ConfigManager.load_config
+        """
+        overlay = {}
+        for key, value in best["params"].items():
+            set_path(overlay, key, value)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(
+                f"# Written by autotune: {best['fps']:.1f} fps, p95 latency "
+                f"{best['latency_p95_ms']:.1f} ms, CPU {best['cpu_percent']:.0f}%\n"
+            )
+            yaml.safe_dump(overlay, f, default_flow_style=None, sort_keys=False)
+        logger.info(f"Autotune overlay written to {path}")
+
+    @staticmethod
+    def write_report(report, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Autotune report written to {path}")
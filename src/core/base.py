@@ -4,6 +4,9 @@ import numpy as np
 import time
 import os
 from loguru import logger
+from src.utils.clock import ClockSync
+from src.utils.frame_bus import FrameBus
+from src.utils.motion import MotionGate
 
 class OakDBase:
     def __init__(self, config: dict):
@@ -11,6 +14,37 @@ class OakDBase:
         self.rgb_resolution = tuple(self.config["camera"]["rgb_resolution"])
         self.fps = self.config["camera"]["fps"]
         self.recording_time = self.config["camera"]["recording_time"]
+        self.queue_size = self.config["camera"].get("queue_size", 4)
+        self.writer_config = self.config.get("writer")
+
+        # Device-to-host clock model used to stamp frames with capture time
+        clock_config = self.config.get("clock", {"enabled": False})
+        self.clock = None
+        if clock_config["enabled"]:
+            self.clock = ClockSync(
+                window=clock_config["window"],
+                latency_floor=clock_config["latency_floor_ms"] / 1000
+            )
+
+        # Motion gate that skips expensive per-frame work on static scenes
+        motion_config = self.config.get("motion", {"enabled": False})
+        self.motion_gate = None
+        self.motion_source = motion_config.get("source", "rgb")
+        if motion_config["enabled"]:
+            self.motion_gate = MotionGate(
+                size=motion_config["size"],
+                on_threshold=motion_config["on_threshold"],
+                off_threshold=motion_config["off_threshold"],
+                hold_frames=motion_config["hold_frames"],
+                keepalive_seconds=motion_config["keepalive_seconds"],
+                reference_alpha=motion_config["reference_alpha"]
+            )
+
+        # Shared-memory rings that hand raw frames to other local processes
+        bus_config = self.config.get("frame_bus", {"enabled": False})
+        self.frame_bus = None
+        if bus_config["enabled"]:
+            self.frame_bus = FrameBus(prefix=bus_config["prefix"], slot_count=bus_config["slots"])
         
         self._setup_output_directory()
         
@@ -40,11 +74,64 @@ class OakDBase:
         """
         raise NotImplementedError("Subclasses must implement setup_pipeline()")
     
-    def add_timestamp(self, frame):
+    def capture_time(self, packet):
+        """
+        Return a packet's capture time as host wall time, or None without a
+        clock model. depthai's host-synced timestamp is used when the packet
+        has one; the device timestamp always feeds the clock model, which
+        reports drift and stands in for packets without a synced timestamp.
+        """
+        if self.clock is None:
+            return None
+        latency = None
+        synced = packet.getTimestamp() if hasattr(packet, "getTimestamp") else None
+        if synced is not None:
+            latency = (dai.Clock.now() - synced).total_seconds()
+        capture = self.clock.observe(packet.getTimestampDevice().total_seconds(), latency=latency)
+        if synced is not None:
+            # dai.Clock is the host monotonic clock the model converts from
+            capture = synced.total_seconds()
+        return self.clock.host_to_wall(capture)
+
+    def clock_summary(self):
+        """
+        One-line summary of capture latency and clock drift, or None before
+        the clock model has synced
+        """
+        if self.clock is None or not self.clock.synced:
+            return None
+        stats = self.clock.stats()
+        if stats["latency_ms"]["p50"] is not None:
+            latency = f"Capture latency p50 {stats['latency_ms']['p50']:.1f} ms, p95 {stats['latency_ms']['p95']:.1f} ms"
+        else:
+            latency = f"Relative receive delay p50 {stats['relative_delay_ms']['p50']:.1f} ms"
+        return f"{latency}, clock drift {stats['drift_ppm']:.1f} ppm"
+
+    def publish_frame(self, stream, frame, packet, capture_time=None):
+        """
+        Publish a raw frame on the frame bus, if enabled, with the packet's
+        sequence number and device timestamp
+        """
+        if self.frame_bus is None:
+            return
+        self.frame_bus.publish(
+            stream,
+            frame,
+            sequence=packet.getSequenceNum(),
+            device_timestamp=packet.getTimestampDevice().total_seconds(),
+            host_timestamp=capture_time
+        )
+
+    def add_timestamp(self, frame, capture_time=None):
         """
-        Add a timestamp to a frame
+        Add a timestamp to a frame: the corrected capture time if known,
+        otherwise the current host time
         """
-        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        if capture_time is None:
+            timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        else:
+            timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(capture_time))
+            timestamp += f".{int(capture_time * 1000) % 1000:03d}"
         cv2.putText(frame, timestamp, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
         return frame
     
@@ -62,10 +149,31 @@ class OakDBase:
         depth_frame = cv2.applyColorMap(depth_frame, colormap)
         return cv2.resize(depth_frame, self.rgb_resolution)
     
+    def log_motion_savings(self, paths=()):
+        """
+        Report what the motion gate skipped, with bytes saved estimated from
+        the size of the files written
+        """
+        if self.motion_gate is None:
+            return None
+        sizes = [os.path.getsize(p) for p in paths if os.path.exists(p)]
+        report = self.motion_gate.report(sum(sizes) if sizes else None)
+        message = (
+            f"Motion gate skipped {report['frames_skipped']}/{report['frames_seen']} frames "
+            f"({report['skipped_fraction']:.0%}), saving ~{report['cpu_seconds_saved']:.1f}s CPU"
+        )
+        if "bytes_saved" in report:
+            message += f" and ~{report['bytes_saved'] / 2**20:.1f} MiB"
+        logger.info(message)
+        return report
+
     def cleanup(self, display=False):
         """
         Clean up resources. This method should be extended by child classes.
         """
+        if self.frame_bus is not None:
+            self.frame_bus.close()
+
         # Close any open windows
         if display:
             cv2.destroyAllWindows()
@@ -0,0 +1,413 @@
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import cv2
+import numpy as np
+from loguru import logger
+
+from .base import OakDBase
+from src.utils.video_writer import create_video_writer
+
+OPERATIONS = ("colorize", "composite", "transcode")
+STATE_FILENAME = ".process_state.json"
+
+
+class SessionProcessor(OakDBase):
+    """
+    Host-only OakDBase used to re-render recorded sessions without a device.
+    """
+    def __init__(self, config: dict):
+        super().__init__(config)
+        self._inverse_lut = self._build_inverse_colormap(config["process"]["source_colormap"])
+
+    def _setup_output_directory(self):
+        """Outputs are written next to each session, so there is nothing to prepare here"""
+        self.output_path = self.config["output"]["base_path"]
+
+    def setup_pipeline(self):
+        return None
+
+    @staticmethod
+    def _build_inverse_colormap(colormap_name):
+        """
+        Build a quantized BGR -> intensity lookup table for a colormap so that
+        colorized depth recordings can be turned back into 8-bit depth.
+        """
+        colormap = getattr(cv2, colormap_name)
+        palette = cv2.applyColorMap(np.arange(256, dtype=np.uint8).reshape(256, 1), colormap)
+        palette = palette.reshape(256, 3).astype(np.int32)
+
+        # 32 levels per channel keeps the table small (32 KiB) while staying
+        # well within the colour error introduced by lossy encoding
+        levels = (np.arange(32, dtype=np.int32) << 3) + 4
+        grid = np.stack(np.meshgrid(levels, levels, levels, indexing="ij"), axis=-1).reshape(-1, 1, 3)
+        distances = ((grid - palette[None, :, :]) ** 2).sum(axis=2)
+        return distances.argmin(axis=1).astype(np.uint8).reshape(32, 32, 32)
+
+    def decolorize(self, frame):
+        """
+        Recover the 8-bit depth intensity from a colorized depth frame
+        """
+        index = frame >> 3
+        return self._inverse_lut[index[..., 0], index[..., 1], index[..., 2]]
+
+    def render(self, operation, rgb_frame, depth_frame):
+        """
+        Produce the output frame for one operation from a pair of recorded frames
+        """
+        if operation == "transcode":
+            return rgb_frame
+
+        depth_frame = self.process_depth_frame(self.decolorize(depth_frame))
+        if operation == "colorize":
+            return depth_frame
+        return np.hstack((rgb_frame, depth_frame))
+
+
+def find_sessions(root, config):
+    """
+    Find recorded session directories below root.
+
+    A session is any directory holding the configured RGB and/or depth
+    recording. Directories produced by previous processing runs are skipped.
+    """
+    output_dirname = config["process"]["output_dirname"]
+    names = (config["output"]["rgb_filename"], config["output"]["depth_filename"])
+    sessions = set()
+    for name in names:
+        for path in Path(root).rglob(name):
+            if output_dirname not in path.parent.parts:
+                sessions.add(path.parent)
+    return sorted(sessions)
+
+
+def _frame_count(path):
+    capture = cv2.VideoCapture(str(path))
+    try:
+        return int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    finally:
+        capture.release()
+
+
+def operation_settings(operation, config):
+    """
+    Config values that change the output of an operation
+    """
+    settings = {"fps": config["camera"]["fps"], "writer": config.get("writer")}
+    if operation in ("colorize", "composite"):
+        settings["depth"] = config["depth"]
+        settings["source_colormap"] = config["process"]["source_colormap"]
+    return settings
+
+
+def operation_tag(operation, config):
+    """
+    Short name for an operation and its settings, used in output names and
+    chunk keys so outputs rendered with different settings never collide
+    """
+    digest = hashlib.sha1(json.dumps(operation_settings(operation, config), sort_keys=True).encode()).hexdigest()[:8]
+    if operation in ("colorize", "composite"):
+        colormap = config["depth"]["colormap"].replace("COLORMAP_", "").lower()
+        return f"{operation}-{colormap}-{digest}"
+    return f"{operation}-{digest}"
+
+
+def _output_path(session, operation, config):
+    return Path(session) / config["process"]["output_dirname"] / f"{operation_tag(operation, config)}.mp4"
+
+
+def plan_tasks(sessions, operation, config):
+    """
+    Split every session into frame-range chunks for the worker pool.
+
+    Returns a list of task dicts and a mapping of final output path to the
+    ordered part files that make it up.
+    """
+    chunk_frames = config["process"]["chunk_frames"]
+    tasks = []
+    outputs = {}
+    for session in sessions:
+        rgb_path = session / config["output"]["rgb_filename"]
+        depth_path = session / config["output"]["depth_filename"]
+        needed = {"transcode": [rgb_path], "colorize": [depth_path]}.get(operation, [rgb_path, depth_path])
+        missing = [str(p) for p in needed if not p.exists()]
+        if missing:
+            logger.warning(f"Skipping {session} for '{operation}': missing {', '.join(missing)}")
+            continue
+
+        total = min(_frame_count(p) for p in needed)
+        if total <= 0:
+            logger.warning(f"Skipping {session}: no frames found")
+            continue
+
+        step = chunk_frames if chunk_frames and chunk_frames > 0 else total
+        output = _output_path(session, operation, config)
+        tag = operation_tag(operation, config)
+        parts = []
+        for start in range(0, total, step):
+            part = output.with_name(f"{output.stem}.part{start:08d}{output.suffix}")
+            parts.append(part)
+            tasks.append({
+                "key": f"{session}|{tag}|{start}",
+                "operation": operation,
+                "rgb_path": str(rgb_path),
+                "depth_path": str(depth_path),
+                "start": start,
+                "end": min(start + step, total),
+                "part_path": str(part),
+                "output_path": str(output),
+            })
+        outputs[output] = parts
+    return tasks, outputs
+
+
+_worker_processor = None
+
+
+def _init_worker(config):
+    global _worker_processor
+    _worker_processor = SessionProcessor(config)
+
+
+def _process_chunk(task):
+    """
+    Render one frame range of a session into its part file
+    """
+    processor = _worker_processor
+    operation = task["operation"]
+    captures = {}
+    if operation in ("transcode", "composite"):
+        captures["rgb"] = cv2.VideoCapture(task["rgb_path"])
+    if operation in ("colorize", "composite"):
+        captures["depth"] = cv2.VideoCapture(task["depth_path"])
+
+    writer = None
+    frames = 0
+    started = time.perf_counter()
+    try:
+        for capture in captures.values():
+            capture.set(cv2.CAP_PROP_POS_FRAMES, task["start"])
+
+        for _ in range(task["end"] - task["start"]):
+            read = {name: capture.read() for name, capture in captures.items()}
+            if not all(ok for ok, _ in read.values()):
+                break
+            rgb_frame = read["rgb"][1] if "rgb" in read else None
+            depth_frame = read["depth"][1] if "depth" in read else None
+
+            if depth_frame is not None:
+                h, w = depth_frame.shape[:2]
+                if rgb_frame is not None:
+                    h, w = rgb_frame.shape[:2]
+                processor.rgb_resolution = (w, h)
+
+            frame = processor.render(operation, rgb_frame, depth_frame)
+            if writer is None:
+                os.makedirs(os.path.dirname(task["part_path"]), exist_ok=True)
+                writer = create_video_writer(
+                    task["part_path"],
+                    processor.fps,
+                    (frame.shape[1], frame.shape[0]),
+                    processor.writer_config
+                )
+                if not writer.isOpened():
+                    raise IOError(f"Failed to initialize video writer at {task['part_path']}")
+            writer.write(frame)
+            frames += 1
+    finally:
+        for capture in captures.values():
+            capture.release()
+        if writer is not None:
+            writer.release()
+
+    return task["key"], frames, time.perf_counter() - started
+
+
+def _concat_parts(output, parts, binary="ffmpeg"):
+    """
+    Join part files with ffmpeg's concat demuxer, copying the encoded stream.
+    Returns False if ffmpeg is unavailable or fails.
+    """
+    executable = shutil.which(binary)
+    if executable is None:
+        return False
+    fd, list_path = tempfile.mkstemp(suffix=".txt", dir=output.parent)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            for part in parts:
+                escaped = str(part.resolve()).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        result = subprocess.run(
+            [executable, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+             "-i", list_path, "-c", "copy", str(output)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+        )
+    finally:
+        os.unlink(list_path)
+    if result.returncode != 0:
+        logger.warning(f"ffmpeg concat failed for {output}, re-encoding instead: {result.stderr.decode(errors='replace').strip()}")
+        return False
+    return True
+
+
+def _reencode_parts(output, parts, fps, writer_config=None):
+    """
+    Join part files by decoding and re-encoding every frame (fallback when
+    ffmpeg is not installed)
+    """
+    writer = None
+    try:
+        for part in parts:
+            capture = cv2.VideoCapture(str(part))
+            try:
+                while True:
+                    ok, frame = capture.read()
+                    if not ok:
+                        break
+                    if writer is None:
+                        writer = create_video_writer(
+                            output,
+                            fps,
+                            (frame.shape[1], frame.shape[0]),
+                            writer_config
+                        )
+                    writer.write(frame)
+            finally:
+                capture.release()
+    finally:
+        if writer is not None:
+            writer.release()
+
+
+def _merge_parts(output, parts, fps, writer_config=None):
+    """
+    Join part files into the final output, in order. Parts are concatenated
+    without re-encoding when ffmpeg is available.
+    """
+    parts = [p for p in parts if p.exists()]
+    if not parts:
+        return
+    if len(parts) == 1:
+        os.replace(parts[0], output)
+        return
+
+    binary = ((writer_config or {}).get("ffmpeg") or {}).get("binary", "ffmpeg")
+    if not _concat_parts(output, parts, binary):
+        logger.debug(f"Re-encoding {len(parts)} parts into {output}")
+        _reencode_parts(output, parts, fps, writer_config)
+
+    for part in parts:
+        part.unlink()
+
+
+class BatchProcessor:
+    """
+    Distribute recorded sessions across a process pool, resuming from the
+    state file left in the root directory by an interrupted run.
+    """
+    def __init__(self, root, config, operation, workers=None, restart=False):
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{operation}', expected one of {', '.join(OPERATIONS)}")
+        self.root = Path(root)
+        self.config = config
+        self.operation = operation
+        self.workers = workers or config["process"]["workers"] or os.cpu_count() or 1
+        self.restart = restart
+        self.state_path = self.root / STATE_FILENAME
+        self.state = {"completed": {}} if restart else self._load_state()
+
+    def _load_state(self):
+        if self.state_path.exists():
+            try:
+                with open(self.state_path, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable state file {self.state_path}: {e}")
+        return {"completed": {}}
+
+    def _save_state(self):
+        tmp_path = self.state_path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def run(self):
+        """
+        Process every pending chunk and return aggregate statistics
+        """
+        sessions = find_sessions(self.root, self.config)
+        logger.info(f"Found {len(sessions)} session(s) under {self.root}")
+        tasks, outputs = plan_tasks(sessions, self.operation, self.config)
+
+        completed = self.state["completed"]
+        if self.restart:
+            # Render everything again, replacing previous outputs
+            for output in outputs:
+                if output.exists():
+                    output.unlink()
+        pending = [
+            t for t in tasks
+            if not (t["key"] in completed and Path(t["part_path"]).exists())
+            and not Path(t["output_path"]).exists()
+        ]
+        skipped = len(tasks) - len(pending)
+        if skipped:
+            logger.info(f"Resuming: {skipped} of {len(tasks)} chunk(s) already done")
+
+        total_frames = 0
+        started = time.perf_counter()
+        if pending:
+            total_frames = self._run_pending(pending)
+
+        merge_started = time.perf_counter()
+        for output, parts in outputs.items():
+            if not output.exists():
+                _merge_parts(output, parts, self.config["camera"]["fps"], self.config.get("writer"))
+        merge_seconds = time.perf_counter() - merge_started
+        elapsed = time.perf_counter() - started
+
+        for task in tasks:
+            completed.pop(task["key"], None)
+        self._save_state()
+
+        stats = {
+            "sessions": len(outputs),
+            "chunks": len(pending),
+            "frames": total_frames,
+            "seconds": elapsed,
+            "merge_seconds": merge_seconds,
+            "fps": total_frames / elapsed if elapsed > 0 else 0.0,
+            "outputs": [str(output) for output in outputs],
+        }
+        logger.info(f"Processed {stats['frames']} frames in {stats['seconds']:.1f}s ({stats['fps']:.1f} fps)")
+        return stats
+
+    def _run_pending(self, pending):
+        total_frames = 0
+        if self.workers == 1:
+            _init_worker(self.config)
+            results = (_process_chunk(task) for task in pending)
+            for key, frames, seconds in results:
+                total_frames += self._record(key, frames, seconds)
+            return total_frames
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(self.config,)) as pool:
+            futures = [pool.submit(_process_chunk, task) for task in pending]
+            for future in as_completed(futures):
+                key, frames, seconds = future.result()
+                total_frames += self._record(key, frames, seconds)
+        return total_frames
+
+    def _record(self, key, frames, seconds):
+        self.state["completed"][key] = frames
+        self._save_state()
+        logger.debug(f"Finished {key}: {frames} frames in {seconds:.1f}s")
+        return frames
+
@@ -0,0 +1,335 @@
+import copy
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+import depthai as dai
+from loguru import logger
+
+from .recorder import OakDCamera, create_recorder_pipeline
+from src.utils.frame_bus import FrameBus
+
+
+class DaemonError(Exception):
+    """Raised by DaemonClient when the daemon rejects a request"""
+
+
+class DeviceDaemon:
+    """
+    Keep an OAK-D device booted with the RGB + depth pipeline running and
+    serve requests over a Unix socket, so CLI commands skip firmware boot and
+    pipeline upload.
+
+    The protocol is one JSON object per line in each direction. Requests
+    carry a 'command' key; responses carry 'ok' and either the result fields
+    or an 'error' message.
+    """
+    def __init__(self, config, socket_path, device_factory=None):
+        self.config = copy.deepcopy(config)
+        self.socket_path = str(socket_path)
+        self.device_factory = device_factory or dai.Device
+        self.started_at = time.time()
+
+        self.device = None
+        self.device_info = {}
+        self.pipeline_started_at = None
+        self.frames_received = 0
+        self.recorder = None
+        self.recording = None
+        # Recordings may only be written below the configured output root
+        self.output_root = Path(self.config["output"]["base_path"]).resolve()
+        self.finished_recordings = OrderedDict()
+
+        self._lock = threading.Lock()
+        self._stop_capture = threading.Event()
+        self._capture_thread = None
+        self._server = None
+
+        # The daemon publishes every frame it pulls, recording or not
+        bus_config = self.config.get("frame_bus", {"enabled": False})
+        self.frame_bus = None
+        if bus_config["enabled"]:
+            self.frame_bus = FrameBus(prefix=bus_config["prefix"], slot_count=bus_config["slots"])
+
+        self.commands = {
+            "ping": self.ping,
+            "status": self.status,
+            "start_pipeline": self.start_pipeline,
+            "stop_pipeline": self.stop_pipeline,
+            "start_recording": self.start_recording,
+            "stop_recording": self.stop_recording,
+            "recording": self.recording_status,
+            "shutdown": self.shutdown,
+        }
+
+    # Commands
+
+    def ping(self):
+        return {"pong": True}
+
+    def status(self):
+        with self._lock:
+            recording = None
+            if self.recording is not None:
+                recording = {
+                    **self.recording,
+                    "frames": self.recorder.frame_count,
+                    "elapsed": time.time() - self.recording["started_at"],
+                }
+            running = self.pipeline_started_at is not None
+            return {
+                "uptime": time.time() - self.started_at,
+                "pipeline_running": running,
+                "pipeline_uptime": time.time() - self.pipeline_started_at if running else None,
+                "frames_received": self.frames_received,
+                "device": self.device_info,
+                "recording": recording,
+            }
+
+    def start_pipeline(self):
+        with self._lock:
+            return self._start_pipeline()
+
+    def stop_pipeline(self):
+        self.stop_recording()
+        self._stop_capture.set()
+        if self._capture_thread is not None:
+            self._capture_thread.join()
+            self._capture_thread = None
+        with self._lock:
+            if self.device is not None:
+                self.device.close()
+                self.device = None
+            self.pipeline_started_at = None
+            if self.frame_bus is not None:
+                self.frame_bus.close()
+        return {}
+
+    def resolve_output_dir(self, output_dir):
+        """
+        Resolve a client-supplied output directory, relative paths against the
+        output root, and refuse anything outside the root
+        """
+        path = (self.output_root / output_dir).resolve()
+        if not path.is_relative_to(self.output_root):
+            raise PermissionError(f"Output directory must be under {self.output_root}")
+        return path
+
+    def start_recording(self, output_dir=None, duration=None):
+        """
+        Start recording to output_dir, relative to the output root, or to a
+        new session directory under the root if none is given
+        """
+        session_id = uuid.uuid4().hex[:12]
+        output_dir = self.resolve_output_dir(output_dir or session_id)
+        with self._lock:
+            if self.recorder is not None:
+                raise RuntimeError("A recording is already in progress")
+            if self.device is None:
+                self._start_pipeline()
+
+            config = copy.deepcopy(self.config)
+            config["output"]["base_path"] = str(output_dir)
+            # Frames are already on the bus from the capture loop
+            config.setdefault("frame_bus", {})["enabled"] = False
+            duration = config["camera"]["recording_time"] if duration is None else duration
+            self.recorder = OakDCamera(config)
+            self.recording = {
+                "session_id": session_id,
+                "output_path": self.recorder.output_path,
+                "duration": duration,
+                "started_at": time.time(),
+            }
+            logger.info(f"Recording for {duration}s to {self.recorder.output_path}")
+            return dict(self.recording)
+
+    def stop_recording(self):
+        with self._lock:
+            return self._finish_recording()
+
+    def recording_status(self, session_id):
+        """
+        State of one recording by the session id start_recording returned
+        """
+        with self._lock:
+            if self.recording is not None and self.recording["session_id"] == session_id:
+                return {"state": "recording", "frames": self.recorder.frame_count}
+            if session_id in self.finished_recordings:
+                return {"state": "finished", **self.finished_recordings[session_id]}
+        raise ValueError(f"Unknown recording session: {session_id}")
+
+    def shutdown(self):
+        # Shut down from another thread: the server waits for this request to finish
+        threading.Thread(target=self.stop, daemon=True).start()
+        return {}
+
+    # Internals
+
+    def _start_pipeline(self):
+        """Boot the device and start capturing. Caller must hold the lock."""
+        if self.device is not None:
+            return {"already_running": True}
+
+        pipeline = create_recorder_pipeline(self.config)
+        logger.info("Booting device and starting pipeline...")
+        self.device = self.device_factory(pipeline)
+        self.device_info = {
+            "device_name": self.device.getDeviceName(),
+            "usb_speed": str(self.device.getUsbSpeed()),
+            "connected_cameras": [str(c) for c in self.device.getConnectedCameras()],
+            "stereo_pairs": [str(p) for p in self.device.getAvailableStereoPairs()],
+        }
+        self.pipeline_started_at = time.time()
+        self._stop_capture.clear()
+        self._capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._capture_thread.start()
+        logger.info(f"Pipeline running on {self.device_info['device_name']}")
+        return {"already_running": False}
+
+    def _finish_recording(self):
+        """Release the current recorder. Caller must hold the lock."""
+        if self.recorder is None:
+            return {"frames": 0}
+        recorder, recording = self.recorder, self.recording
+        self.recorder = None
+        self.recording = None
+        recorder.cleanup()
+        result = {"frames": recorder.frame_count, "output_path": recording["output_path"]}
+        self.finished_recordings[recording["session_id"]] = result
+        while len(self.finished_recordings) > 64:
+            self.finished_recordings.popitem(last=False)
+        return {"session_id": recording["session_id"], **result}
+
+    def _capture_loop(self):
+        """
+        Pull frames continuously so the device queues never back up, and hand
+        RGB/depth pairs to the active recording
+        """
+        queue_size = self.config["camera"].get("queue_size", 4)
+        qRgb = self.device.getOutputQueue(name="rgb", maxSize=queue_size, blocking=False)
+        qDepth = self.device.getOutputQueue(name="depth", maxSize=queue_size, blocking=False)
+        inRgb = inDepth = None
+        while not self._stop_capture.is_set():
+            packet = qRgb.tryGet()
+            if packet is not None:
+                inRgb = packet
+            packet = qDepth.tryGet()
+            if packet is not None:
+                inDepth = packet
+            if inRgb is None or inDepth is None:
+                time.sleep(0.001)
+                continue
+
+            if self.frame_bus is not None:
+                for stream, packet, frame in (("rgb", inRgb, inRgb.getCvFrame()), ("depth", inDepth, inDepth.getFrame())):
+                    self.frame_bus.publish(
+                        stream, frame,
+                        sequence=packet.getSequenceNum(),
+                        device_timestamp=packet.getTimestampDevice().total_seconds()
+                    )
+
+            with self._lock:
+                self.frames_received += 1
+                if self.recorder is not None:
+                    try:
+                        self.recorder.process_frames(inRgb, inDepth)
+                    except Exception:
+                        logger.exception("Recording failed, stopping it")
+                        self._finish_recording()
+                    else:
+                        if time.time() - self.recording["started_at"] >= self.recording["duration"]:
+                            self._finish_recording()
+            inRgb = inDepth = None
+
+    def handle(self, request):
+        """
+        Dispatch one decoded request and build the response
+        """
+        command = request.pop("command", None)
+        handler = self.commands.get(command)
+        if handler is None:
+            return {"ok": False, "error": f"Unknown command: {command}"}
+        try:
+            return {"ok": True, **handler(**request)}
+        except Exception as e:
+            logger.exception(f"Daemon command '{command}' failed")
+            return {"ok": False, "error": str(e)}
+
+    def serve_forever(self, start_pipeline=True):
+        """
+        Bind the Unix socket and serve requests until shutdown
+        """
+        if os.path.exists(self.socket_path):
+            if DaemonClient(self.socket_path).is_available():
+                raise RuntimeError(f"A daemon is already listening on {self.socket_path}")
+            os.unlink(self.socket_path)
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        request = json.loads(line)
+                    except ValueError:
+                        response = {"ok": False, "error": "Malformed request"}
+                    else:
+                        response = daemon.handle(request)
+                    self.wfile.write((json.dumps(response) + "\n").encode())
+                    self.wfile.flush()
+
+        self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        self._server.daemon_threads = True
+        try:
+            if start_pipeline:
+                self.start_pipeline()
+            logger.info(f"Daemon listening on {self.socket_path}")
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            self._server = None
+            self.stop_pipeline()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            logger.info("Daemon stopped")
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+
+
+class DaemonClient:
+    """
+    Talk to a running DeviceDaemon over its Unix socket
+    """
+    def __init__(self, socket_path, timeout=10.0):
+        self.socket_path = str(socket_path)
+        self.timeout = timeout
+
+    def is_available(self):
+        try:
+            self.request("ping")
+            return True
+        except (OSError, DaemonError):
+            return False
+
+    def request(self, command, **args):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            sock.sendall((json.dumps({"command": command, **args}) + "\n").encode())
+            with sock.makefile('rb') as f:
+                line = f.readline()
+        if not line:
+            raise DaemonError(f"Daemon closed the connection during '{command}'")
+        response = json.loads(line)
+        if not response.pop("ok", False):
+            raise DaemonError(response.get("error", "Unknown error"))
+        return response
+
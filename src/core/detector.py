@@ -1,21 +1,56 @@
 # Import all necessary modules
+from collections import OrderedDict, deque
 from pathlib import Path
+import copy
 import os
-import blobconverter
+import time
 import cv2
 import depthai as dai
 import numpy as np
 from loguru import logger
 
+from .analytics import DetectionAnalytics
 from .base import OakDBase
 from src.utils.config import ConfigManager
+from src.utils.crop_archive import CropArchive, expand_box, preview_to_full
+from src.utils.pipeline_spec import compile_pipeline
+from src.utils.video_writer import create_video_writer
+
+# Class labels of the MobileNet-SSD (VOC) model used for detection
+MOBILENET_SSD_LABELS = [
+    "background", "aeroplane", "bicycle", "bird", "boat", "bottle", "bus", "car", "cat", 
+    "chair", "cow", "diningtable", "dog", "horse", "motorbike", "person", "pottedplant", 
+    "sheep", "sofa", "train", "tvmonitor"
+]
+
+# Device-side script for ROI capture: forward a full-resolution frame to the
+# host only when the matching NN result has detections, at most once every
+# {interval} sensor frames. The buffered frame with the closest sequence number
+# is sent; the host pairs it with that frame's own detections, or rejects it.
+ROI_SCRIPT = """
+interval = {interval}
+min_confidence = {min_confidence}
+last = -interval
+frames = []
+while True:
+    dets = node.io['detections'].get()
+    frames = (frames + node.io['frames'].tryGetAll())[-2:]
+    seq = dets.getSequenceNum()
+    if seq - last < interval:
+        continue
+    if not any(d.confidence >= min_confidence for d in dets.detections):
+        continue
+    if frames:
+        node.io['hires'].send(min(frames, key=lambda f: abs(f.getSequenceNum() - seq)))
+        last = seq
+"""
 
 
 class OakDObjectDetectionApp(OakDBase):
-    def __init__(self, confidence_threshold=0.5, preview_size=(304, 304), save_video=False, display_info=True, output_path=None, config=None):
+    def __init__(self, confidence_threshold=None, preview_size=None, save_video=False, display_info=True, output_path=None, config=None, build_pipeline=True):
         # Use provided config or default
         if config is None:
-            config = ConfigManager.DEFAULT_CONFIG.copy()
+            config = copy.deepcopy(ConfigManager.DEFAULT_CONFIG)
             # Override base path if output_path is provided, otherwise use default or current dir
             if output_path:
                  config["output"]["base_path"] = os.path.dirname(output_path)
@@ -25,86 +60,88 @@ class OakDObjectDetectionApp(OakDBase):
         # Initialize the base class
         super().__init__(config)
         
-        # Object detection specific attributes
-        self.confidence_threshold = confidence_threshold
-        self.preview_size = preview_size
+        # Object detection specific attributes; arguments override the 'detection' config section
+        detection_config = self.config.get("detection", ConfigManager.DEFAULT_CONFIG["detection"])
+        self.confidence_threshold = detection_config["confidence_threshold"] if confidence_threshold is None else confidence_threshold
+        self.preview_size = tuple(detection_config["preview_size"] if preview_size is None else preview_size)
+        self.sync_nn = detection_config.get("sync_nn", True)
         self.save_video = save_video
         self.display_info = display_info
         self.video_output_path = output_path if output_path else os.path.join(self.output_path, "object_detection.mp4")
         self.frame = None
+        self.frame_capture_time = None
         self.detections = []
+        self.detections_capture_time = None
         self.video_writer = None
         
         # Initialize the labels for MobileNet-SSD
-        self.labels = [
-            "background", "aeroplane", "bicycle", "bird", "boat", "bottle", "bus", "car", "cat", 
-            "chair", "cow", "diningtable", "dog", "horse", "motorbike", "person", "pottedplant", 
-            "sheep", "sofa", "train", "tvmonitor"
-        ]
+        self.labels = list(MOBILENET_SSD_LABELS)
+
+        # Sliding-window statistics over the detection stream
+        analytics_config = self.config.get("analytics", ConfigManager.DEFAULT_CONFIG["analytics"])
+        self.analytics = None
+        self.show_analytics = False
+        self.analytics_log_interval = analytics_config["log_interval"]
+        self.analytics_metrics_path = analytics_config["metrics_path"]
+        self._last_analytics_log = time.monotonic()
+        if analytics_config["enabled"]:
+            self.analytics = DetectionAnalytics(
+                self.labels,
+                windows=analytics_config["windows"],
+                buckets=analytics_config["buckets"]
+            )
+            self.show_analytics = analytics_config["show_in_panel"]
         
-        # Create and configure the pipeline
-        self.pipeline = self.create_pipeline()
+        # Full-resolution crops of detected objects, archived next to the preview stream
+        self.roi_config = self.config.get("roi_capture", ConfigManager.DEFAULT_CONFIG["roi_capture"])
+        self.roi_archive = None
+        self.hires_frames = 0
+        self._recent_detections = OrderedDict()
+        self._pending_hires = deque(maxlen=4)
+        if self.roi_config["enabled"]:
+            self.roi_archive = CropArchive(
+                os.path.join(self.output_path, self.roi_config["dirname"]),
+                jpeg_quality=self.roi_config["jpeg_quality"]
+            )
+
+        # Create and configure the pipeline (skipped for host-only use such as soak tests)
+        if build_pipeline:
+            self.pipeline = self.create_pipeline()
         
     def setup_pipeline(self):
         """Override the base class method to set up the object detection pipeline"""
         return self.create_pipeline()
         
     def create_pipeline(self):
-        pipeline = dai.Pipeline()
-        
-        # Define sources and outputs
-        camRgb = pipeline.create(dai.node.ColorCamera)
-        spatialDetectionNetwork = pipeline.create(dai.node.MobileNetSpatialDetectionNetwork)
-        monoLeft = pipeline.create(dai.node.MonoCamera)
-        monoRight = pipeline.create(dai.node.MonoCamera)
-        stereo = pipeline.create(dai.node.StereoDepth)
-        
-        xoutRgb = pipeline.create(dai.node.XLinkOut)
-        xoutNN = pipeline.create(dai.node.XLinkOut)
-        xoutDepth = pipeline.create(dai.node.XLinkOut)
-        
-        xoutRgb.setStreamName("rgb")
-        xoutNN.setStreamName("detections")
-        xoutDepth.setStreamName("depth")
+        # Topology comes from the 'detection' pipeline spec, with this app's settings
+        config = {
+            **self.config,
+            "detection": {
+                **self.config.get("detection", ConfigManager.DEFAULT_CONFIG["detection"]),
+                "confidence_threshold": self.confidence_threshold,
+                "preview_size": list(self.preview_size),
+                "sync_nn": self.sync_nn,
+            },
+        }
+        pipeline, nodes = compile_pipeline("detection", config)
         
-        # Properties
-        camRgb.setPreviewSize(self.preview_size[0], self.preview_size[1])
-        camRgb.setResolution(dai.ColorCameraProperties.SensorResolution.THE_1080_P)
-        camRgb.setInterleaved(False)
-        camRgb.setColorOrder(dai.ColorCameraProperties.ColorOrder.BGR)
-        camRgb.setFps(30)
-        
-        # Set mono camera properties
-        monoLeft.setResolution(dai.MonoCameraProperties.SensorResolution.THE_400_P)
-        monoLeft.setBoardSocket(dai.CameraBoardSocket.CAM_B)
-        monoRight.setResolution(dai.MonoCameraProperties.SensorResolution.THE_400_P)
-        monoRight.setBoardSocket(dai.CameraBoardSocket.CAM_C)
-        
-        # Set stereo depth properties
-        stereo.setDefaultProfilePreset(dai.node.StereoDepth.PresetMode.DEFAULT)
-        stereo.setDepthAlign(dai.CameraBoardSocket.CAM_A)
-        # Make sure dimensions are multiples of 16 for stereo depth
-        stereo_width = (self.preview_size[0] // 16) * 16
-        stereo_height = (self.preview_size[1] // 16) * 16
-        stereo.setOutputSize(stereo_width, stereo_height)
-        
-        # Set up the MobileNet spatial detection network
-        spatialDetectionNetwork.setBlobPath(blobconverter.from_zoo(name='mobilenet-ssd', shaves=6))
-        spatialDetectionNetwork.setConfidenceThreshold(self.confidence_threshold)
-        spatialDetectionNetwork.input.setBlocking(False)
-        spatialDetectionNetwork.setBoundingBoxScaleFactor(0.5)
-        spatialDetectionNetwork.setDepthLowerThreshold(100)
-        spatialDetectionNetwork.setDepthUpperThreshold(5000)
-        
-        # Linking
-        camRgb.preview.link(spatialDetectionNetwork.input)
-        spatialDetectionNetwork.passthrough.link(xoutRgb.input)
-        spatialDetectionNetwork.out.link(xoutNN.input)
-        
-        monoLeft.out.link(stereo.left)
-        monoRight.out.link(stereo.right)
-        stereo.depth.link(spatialDetectionNetwork.inputDepth)
-        stereo.depth.link(xoutDepth.input)
+        if self.roi_archive is not None:
+            # Reduced-rate full-resolution stream, gated on detections by a script node
+            script = pipeline.create(dai.node.Script)
+            script.setScript(ROI_SCRIPT.format(
+                interval=self.roi_config["interval_frames"],
+                min_confidence=self.roi_config["min_confidence"]
+            ))
+            script.inputs['frames'].setBlocking(False)
+            script.inputs['frames'].setQueueSize(2)
+            script.inputs['detections'].setBlocking(False)
+            script.inputs['detections'].setQueueSize(2)
+            xoutHires = pipeline.create(dai.node.XLinkOut)
+            xoutHires.setStreamName("hires")
+
+            nodes["camera"].video.link(script.inputs['frames'])
+            nodes["nn"].out.link(script.inputs['detections'])
+            script.outputs['hires'].link(xoutHires.input)
         
         return pipeline
     
@@ -116,6 +153,28 @@ class OakDObjectDetectionApp(OakDBase):
         normVals[::2] = frame.shape[1]
         return (np.clip(np.array(bbox), 0, 1) * normVals).astype(int)
     
+    def detection_to_dict(self, detection, capture_time=None):
+        """
+        Convert a detection to a JSON-serializable record. Spatial coordinates
+        are in meters and are zero when no depth is available.
+        """
+        spatial_coords = detection.spatialCoordinates
+        record = {
+            'label': int(detection.label),
+            'label_name': self.labels[detection.label],
+            'confidence': float(detection.confidence),
+            'xmin': float(detection.xmin),
+            'ymin': float(detection.ymin),
+            'xmax': float(detection.xmax),
+            'ymax': float(detection.ymax),
+            'x': spatial_coords.x / 1000,
+            'y': spatial_coords.y / 1000,
+            'z': spatial_coords.z / 1000
+        }
+        if capture_time is not None:
+            record['capture_time'] = capture_time
+        return record
+
     def visualize_detections(self, frame, detections):
         """
         Draw bounding boxes, labels, and distance information for detections on the frame
@@ -157,11 +216,13 @@ class OakDObjectDetectionApp(OakDBase):
         
         # Display information in the corner of the frame if enabled
         if detected_objects and self.display_info:
+            analytics_lines = self.analytics.summary_lines() if self.show_analytics else []
+
             # Background for text
             padding = 10
             line_height = 25
             max_width = 300
-            total_height = padding * 2 + line_height * (len(detected_objects) + 1)
+            total_height = padding * 2 + line_height * (len(detected_objects) + len(analytics_lines) + 1)
             
             # Create semi-transparent overlay for text background
             overlay = frame.copy()
@@ -181,9 +242,169 @@ class OakDObjectDetectionApp(OakDBase):
                 cv2.putText(frame, info_text, 
                            (frame.shape[1] - max_width, y_pos), 
                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+            # Add sliding-window analytics below the objects
+            for i, line in enumerate(analytics_lines):
+                y_pos = padding + line_height * (len(detected_objects) + i + 2)
+                cv2.putText(frame, line,
+                           (frame.shape[1] - max_width, y_pos),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 255), 1)
         
         return frame
+
+    def update_analytics(self, detections):
+        """
+        Feed a detection result into the analytics and periodically publish a snapshot
+        """
+        if self.analytics is None:
+            return
+
+        self.analytics.update(detections)
+        now = time.monotonic()
+        if now - self._last_analytics_log < self.analytics_log_interval:
+            return
+
+        self._last_analytics_log = now
+        snapshot = self.analytics.snapshot()
+        logger.info(f"Detection analytics: {' / '.join(self.analytics.summary_lines(snapshot))}")
+        summary = self.clock_summary()
+        if summary is not None:
+            logger.info(summary)
+        if self.analytics_metrics_path:
+            self.analytics.write_metrics(self.analytics_metrics_path, snapshot)
     
+    def open_video_writer(self, frame):
+        """
+        Create the video writer sized to the first frame that will be saved
+        """
+        h, w = frame.shape[:2]
+        # Ensure directory exists
+        os.makedirs(os.path.dirname(os.path.abspath(self.video_output_path)), exist_ok=True)
+        self.video_writer = create_video_writer(
+            self.video_output_path,
+            self.fps, # Use fps from config
+            (w, h),
+            self.writer_config
+        )
+        logger.info(f"Recording video to {self.video_output_path}")
+
+    def process_packets(self, inRgb, inDet):
+        """
+        Handle one round of queue packets: update the current frame and detections,
+        annotate, and save the frame if enabled. Returns the annotated frame, or
+        None when there is nothing new to show.
+        """
+        if inRgb is not None:
+            # Get the frame in OpenCV format
+            self.frame = inRgb.getCvFrame()
+            self.frame_capture_time = self.capture_time(inRgb)
+            self.publish_frame("preview", self.frame, inRgb, self.frame_capture_time)
+            self.frame_count += 1
+        
+        if inDet is not None:
+            # Get the detections with spatial data
+            self.detections = inDet.detections
+            self.detections_capture_time = self.capture_time(inDet)
+            self.update_analytics(self.detections)
+            if self.roi_archive is not None:
+                self._recent_detections[inDet.getSequenceNum()] = (self.detections, self.detections_capture_time)
+                while len(self._recent_detections) > 32:
+                    self._recent_detections.popitem(last=False)
+        
+        if self.frame is None or (inRgb is None and inDet is None):
+            return None
+
+        # Skip annotating and encoding while the scene is static. Detection-only
+        # updates follow the decision made for the frame they annotate.
+        if self.motion_gate is not None:
+            passed = self.motion_gate.update(self.frame) if inRgb is not None else self.motion_gate.repeat()
+            if not passed:
+                return None
+            started = time.perf_counter()
+
+        # Process the frame with detections and spatial information
+        frame_with_detections = self.visualize_detections(self.frame.copy(), self.detections)
+        if self.frame_capture_time is not None:
+            frame_with_detections = self.add_timestamp(frame_with_detections, self.frame_capture_time)
+        
+        # Save each new frame to video if enabled
+        if self.save_video and inRgb is not None:
+            if self.video_writer is None:
+                self.open_video_writer(frame_with_detections)
+            self.video_writer.write(frame_with_detections)
+        if self.motion_gate is not None:
+            self.motion_gate.add_processing_time(time.perf_counter() - started)
+
+        return frame_with_detections
+
+    def process_depth(self, inDepth):
+        """
+        Publish a depth frame on the frame bus, if enabled. Depth is only
+        used on the device otherwise.
+        """
+        if inDepth is None or self.frame_bus is None:
+            return
+        self.publish_frame("depth", inDepth.getFrame(), inDepth, self.capture_time(inDepth))
+
+    def crop_detections(self, frame, detections, sequence, capture_time=None):
+        """
+        Archive a full-resolution crop of every confident detection. Boxes are
+        relative to the NN preview, a center crop of the full frame.
+        Returns the number of crops written.
+        """
+        full_size = (frame.shape[1], frame.shape[0])
+        written = 0
+        for detection in detections:
+            if detection.confidence < self.roi_config["min_confidence"]:
+                continue
+            box = preview_to_full(
+                (detection.xmin, detection.ymin, detection.xmax, detection.ymax),
+                self.preview_size,
+                full_size
+            )
+            box = expand_box(box, full_size, margin=self.roi_config["margin"], min_size=self.roi_config["min_size"])
+            if box is None:
+                continue
+            record = self.detection_to_dict(detection, capture_time)
+            record['sequence'] = sequence
+            if self.roi_archive.add(frame, box, record) is not None:
+                written += 1
+        return written
+
+    def process_hires(self, inHires=None):
+        """
+        Pair full-resolution frames with the detections of the same sensor
+        frame and archive the crops. Frames whose detections have not reached
+        the host yet wait for them. Returns the number of crops written.
+        """
+        if self.roi_archive is None:
+            return 0
+        if inHires is not None:
+            self._pending_hires.append(inHires)
+
+        written = 0
+        max_gap = self.roi_config["max_frame_gap"]
+        while self._pending_hires:
+            packet = self._pending_hires[0]
+            sequence = packet.getSequenceNum()
+            match = self._recent_detections.get(sequence)
+            if match is None:
+                if not self._recent_detections or next(reversed(self._recent_detections)) < sequence:
+                    break  # Detections for this frame may still be on their way
+                # The NN skipped this frame; a result close enough in time stands in
+                nearest = min(self._recent_detections, key=lambda s: abs(s - sequence))
+                if abs(nearest - sequence) <= max_gap:
+                    match = self._recent_detections[nearest]
+            self._pending_hires.popleft()
+            if match is None:
+                logger.debug(f"No detections within {max_gap} frames of full-resolution frame {sequence}")
+                continue
+
+            self.hires_frames += 1
+            detections, capture_time = match
+            written += self.crop_detections(packet.getCvFrame(), detections, sequence, capture_time)
+        return written
+
     def run(self):
         """
         Run the object detection application with spatial detection
@@ -196,53 +417,26 @@ class OakDObjectDetectionApp(OakDBase):
                 logger.info(f'Device name: {device.getDeviceName()}')
                 
                 # Get output queues
-                qRgb = device.getOutputQueue(name="rgb", maxSize=4, blocking=False)
-                qDet = device.getOutputQueue(name="detections", maxSize=4, blocking=False)
-                qDepth = device.getOutputQueue(name="depth", maxSize=4, blocking=False)
+                qRgb = device.getOutputQueue(name="rgb", maxSize=self.queue_size, blocking=False)
+                qDet = device.getOutputQueue(name="detections", maxSize=self.queue_size, blocking=False)
+                qDepth = device.getOutputQueue(name="depth", maxSize=self.queue_size, blocking=False)
+                qHires = None
+                if self.roi_archive is not None:
+                    qHires = device.getOutputQueue(name="hires", maxSize=self.queue_size, blocking=False)
             
                 logger.info("Starting object detection with depth-based distance measurement. Press 'q' to quit.")
                 
-                # Initialize video writer if saving is enabled
-                if self.save_video:
-                    # Wait for first frame to get dimensions
-                    while True:
-                        inRgb = qRgb.tryGet()
-                        if inRgb is not None:
-                            frame = inRgb.getCvFrame()
-                            h, w = frame.shape[:2]
-                            # Ensure directory exists
-                            os.makedirs(os.path.dirname(os.path.abspath(self.video_output_path)), exist_ok=True)
-                            self.video_writer = cv2.VideoWriter(
-                                self.video_output_path, 
-                                cv2.VideoWriter_fourcc(*'mp4v'), 
-                                self.fps, # Use fps from config
-                                (w, h)
-                            )
-                            logger.info(f"Recording video to {self.video_output_path}")
-                            break
-                
                 while True:
                     # Try to get data from the queues
                     inRgb = qRgb.tryGet()
                     inDet = qDet.tryGet()
                     inDepth = qDepth.tryGet()
                     
-                    if inRgb is not None:
-                        # Get the frame in OpenCV format
-                        self.frame = inRgb.getCvFrame()
-                    
-                    if inDet is not None:
-                        # Get the detections with spatial data
-                        self.detections = inDet.detections
-                    
-                    if self.frame is not None:
-                        # Process the frame with detections and spatial information
-                        frame_with_detections = self.visualize_detections(self.frame.copy(), self.detections)
-                        
-                        # Save frame to video if enabled
-                        if self.save_video and self.video_writer is not None:
-                            self.video_writer.write(frame_with_detections)
-                        
+                    frame_with_detections = self.process_packets(inRgb, inDet)
+                    self.process_depth(inDepth)
+                    if qHires is not None:
+                        self.process_hires(qHires.tryGet())
+                    if frame_with_detections is not None:
                         # Display the frame
                         cv2.imshow("OAK-D Spatial Object Detection", frame_with_detections)
                     
@@ -261,6 +455,13 @@ class OakDObjectDetectionApp(OakDBase):
         if self.save_video and self.video_writer is not None:
             self.video_writer.release()
             logger.info(f"Video saved to {self.video_output_path}")
+        self.log_motion_savings([self.video_output_path] if self.save_video else [])
+        if self.roi_archive is not None:
+            self.roi_archive.close()
+            logger.info(
+                f"Archived {self.roi_archive.crops} object crops from {self.hires_frames} full-resolution "
+                f"frames ({self.roi_archive.bytes_written / 2**20:.1f} MiB) to {self.roi_archive.path}"
+            )
         
         # Call the parent class cleanup method
         super().cleanup(display)
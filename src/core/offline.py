@@ -0,0 +1,239 @@
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+from loguru import logger
+
+from .batch import find_sessions
+from .detector import OakDObjectDetectionApp
+
+_END = object()
+
+
+class OfflineDetectionApp(OakDObjectDetectionApp):
+    """
+    Run the MobileNet-SSD detector on recorded RGB video on the host CPU.
+
+    Expects a CPU export (ONNX, OpenVINO IR or the original Caffe model) of
+    the network that blobconverter.from_zoo compiles for the device. Frames
+    are decoded on a background thread and inferred in batches by a pool of
+    inference threads, each owning its own network instance. With more than
+    one inference thread, OpenCV's own threading is turned off while a video
+    is processed so the two do not oversubscribe the cores.
+    """
+    def __init__(self, config, net_factory=None):
+        offline_config = config["offline_detection"]
+        super().__init__(
+            confidence_threshold=offline_config["confidence_threshold"],
+            config=config,
+            build_pipeline=False
+        )
+        self.input_size = tuple(offline_config["input_size"])
+        self.scale = offline_config["scale"]
+        self.mean = tuple(offline_config["mean"])
+        self.swap_rb = offline_config["swap_rb"]
+        self.batch_size = max(1, offline_config["batch_size"])
+        self.workers = offline_config["workers"] or os.cpu_count() or 1
+        self.output_suffix = offline_config["output_suffix"]
+        self.net_factory = net_factory or (lambda: self.load_net(offline_config))
+
+    def _setup_output_directory(self):
+        """Detections are written next to each input video"""
+        self.output_path = self.config["output"]["base_path"]
+
+    @staticmethod
+    def load_net(offline_config):
+        model_path = offline_config["model_path"]
+        if not model_path or not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"Offline detection model not found: {model_path!r}. Set offline_detection.model_path "
+                "to an ONNX, OpenVINO IR (.xml) or Caffe export of mobilenet-ssd."
+            )
+        net = cv2.dnn.readNet(model_path, offline_config["config_path"] or "")
+        net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        return net
+
+    def parse_output(self, output, batch_len):
+        """
+        Split an SSD DetectionOutput blob of shape [1, 1, N, 7] into per-frame
+        detections shaped like the device's ImgDetection objects
+        """
+        results = [[] for _ in range(batch_len)]
+        for image_id, label, confidence, xmin, ymin, xmax, ymax in output.reshape(-1, 7):
+            image_id = int(image_id)
+            if image_id < 0:
+                # DetectionOutput pads the blob with image_id -1 rows
+                break
+            if confidence < self.confidence_threshold or not 0 <= image_id < batch_len:
+                continue
+            results[image_id].append(SimpleNamespace(
+                label=int(label),
+                confidence=float(confidence),
+                xmin=float(xmin), ymin=float(ymin),
+                xmax=float(xmax), ymax=float(ymax),
+                spatialCoordinates=SimpleNamespace(x=0.0, y=0.0, z=0.0)
+            ))
+        return results
+
+    def _decode(self, video_path, batches, stop):
+        """
+        Decode frames on a background thread and group them into batches
+        """
+        capture = cv2.VideoCapture(str(video_path))
+        try:
+            index = 0
+            batch = []
+            while not stop.is_set():
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                batch.append(frame)
+                if len(batch) == self.batch_size:
+                    batches.put((index, batch))
+                    index += len(batch)
+                    batch = []
+            if batch:
+                batches.put((index, batch))
+        finally:
+            capture.release()
+            for _ in range(self.workers):
+                batches.put(_END)
+
+    def _infer(self, batches, results):
+        try:
+            net = self.net_factory()
+            while True:
+                item = batches.get()
+                if item is _END:
+                    break
+                start, frames = item
+                blob = cv2.dnn.blobFromImages(frames, self.scale, self.input_size, self.mean, self.swap_rb, False)
+                net.setInput(blob)
+                results.put((start, self.parse_output(net.forward(), len(frames))))
+        except Exception as e:
+            results.put(e)
+        finally:
+            results.put(_END)
+
+    def detect_video(self, video_path, output_path=None):
+        """
+        Detect objects in every frame of a video and write one JSON line per
+        frame. Returns the number of frames processed.
+        """
+        video_path = Path(video_path)
+        output_path = Path(output_path) if output_path else video_path.with_name(video_path.stem + self.output_suffix)
+
+        capture = cv2.VideoCapture(str(video_path))
+        if not capture.isOpened():
+            capture.release()
+            raise IOError(f"Could not open video {video_path}")
+        fps = capture.get(cv2.CAP_PROP_FPS) or self.fps
+        capture.release()
+
+        cv_threads = cv2.getNumThreads()
+        if self.workers > 1:
+            cv2.setNumThreads(1)
+
+        batches = queue.Queue(maxsize=self.workers * 2)
+        results = queue.Queue()
+        stop = threading.Event()
+        threads = [threading.Thread(target=self._decode, args=(video_path, batches, stop), daemon=True)]
+        threads += [threading.Thread(target=self._infer, args=(batches, results), daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        frames = 0
+        pending = {}
+        finished = 0
+        tmp_path = output_path.with_name(output_path.name + ".tmp")
+        try:
+            with open(tmp_path, 'w') as f:
+                while finished < self.workers:
+                    item = results.get()
+                    if item is _END:
+                        finished += 1
+                        continue
+                    if isinstance(item, Exception):
+                        raise item
+                    start, detections = item
+                    pending[start] = detections
+
+                    # Batches can complete out of order; write them in frame order
+                    while frames in pending:
+                        for detections in pending.pop(frames):
+                            f.write(json.dumps({
+                                'frame': frames,
+                                'timestamp': frames / fps,
+                                'detections': [self.detection_to_dict(d) for d in detections]
+                            }) + "\n")
+                            frames += 1
+            os.replace(tmp_path, output_path)
+        finally:
+            stop.set()
+            decoder, inference = threads[0], threads[1:]
+            # Unblock the decoder if it is waiting on a full queue
+            while decoder.is_alive():
+                try:
+                    batches.get_nowait()
+                except queue.Empty:
+                    decoder.join(0.1)
+            # Draining may have taken the decoder's end markers: discard what is
+            # left and hand every inference thread a fresh one
+            while True:
+                try:
+                    batches.get_nowait()
+                except queue.Empty:
+                    break
+            for _ in inference:
+                batches.put(_END)
+            for thread in inference:
+                thread.join()
+            cv2.setNumThreads(cv_threads)
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+        self.frame_count += frames
+        logger.info(f"Wrote detections for {frames} frames to {output_path}")
+        return frames
+
+    def run_offline(self, input_path):
+        """
+        Run detection on a video file, or on the RGB recording of every session
+        below a directory. Returns aggregate throughput statistics.
+        """
+        input_path = Path(input_path)
+        if input_path.is_dir():
+            videos = [s / self.config["output"]["rgb_filename"] for s in find_sessions(input_path, self.config)]
+            videos = [v for v in videos if v.exists()]
+        else:
+            videos = [input_path]
+
+        frames = 0
+        failed = []
+        started = time.perf_counter()
+        for video in videos:
+            try:
+                frames += self.detect_video(video)
+            except IOError as e:
+                if not input_path.is_dir():
+                    raise
+                # One unreadable session does not stop the rest
+                logger.error(f"Skipping {video}: {e}")
+                failed.append(str(video))
+        elapsed = time.perf_counter() - started
+
+        stats = {
+            "videos": len(videos) - len(failed),
+            "failed": failed,
+            "frames": frames,
+            "seconds": elapsed,
+            "fps": frames / elapsed if elapsed > 0 else 0.0,
+        }
+        logger.info(f"Detected {stats['frames']} frames from {stats['videos']} video(s) at {stats['fps']:.1f} fps")
+        return stats
@@ -5,6 +5,16 @@ import time
 import os
 from loguru import logger
 from .base import OakDBase
+from src.utils.pipeline_spec import compile_pipeline
+from src.utils.video_writer import create_video_writer
+
+def create_recorder_pipeline(config):
+    """
+    Build the RGB + depth pipeline used for recording from the 'record' spec
+    """
+    pipeline, _ = compile_pipeline("record", config)
+    return pipeline
+
 
 class OakDCamera(OakDBase):
     def __init__(self, config):
@@ -16,59 +26,28 @@ class OakDCamera(OakDBase):
         self.setup_video_writers()
 
     def setup_pipeline(self):
-        self.pipeline = dai.Pipeline()
-
-        # Define sources and outputs
-        camRgb = self.pipeline.create(dai.node.ColorCamera)
-        left = self.pipeline.create(dai.node.MonoCamera)
-        right = self.pipeline.create(dai.node.MonoCamera)
-        stereo = self.pipeline.create(dai.node.StereoDepth)
-
-        xoutRgb = self.pipeline.create(dai.node.XLinkOut)
-        xoutDepth = self.pipeline.create(dai.node.XLinkOut)
-
-        xoutRgb.setStreamName("rgb")
-        xoutDepth.setStreamName("depth")
-
-        # Properties
-        camRgb.setPreviewSize(*self.rgb_resolution)
-        camRgb.setInterleaved(False)
-        camRgb.setColorOrder(dai.ColorCameraProperties.ColorOrder.BGR)
-
-        left.setResolution(dai.MonoCameraProperties.SensorResolution.THE_400_P)
-        left.setBoardSocket(dai.CameraBoardSocket.CAM_B)
-        right.setResolution(dai.MonoCameraProperties.SensorResolution.THE_400_P)
-        right.setBoardSocket(dai.CameraBoardSocket.CAM_C)
-
-        stereo.setDefaultProfilePreset(dai.node.StereoDepth.PresetMode.DEFAULT)
-        stereo.setDepthAlign(dai.CameraBoardSocket.CAM_A)
-
-        # Linking
-        camRgb.preview.link(xoutRgb.input)
-        left.out.link(stereo.left)
-        right.out.link(stereo.right)
-        stereo.depth.link(xoutDepth.input)
+        self.pipeline = create_recorder_pipeline(self.config)
 
     def setup_video_writers(self):
-        # Video writers with H.264 codec for Mac compatibility
+        # Backend and codec come from the 'writer' config section
         rgb_path = os.path.join(self.output_path, self.config["output"]["rgb_filename"])
         depth_path = os.path.join(self.output_path, self.config["output"]["depth_filename"])
         
         try:
-            self.rgb_writer = cv2.VideoWriter(
+            self.rgb_writer = create_video_writer(
                 rgb_path,
-                cv2.VideoWriter_fourcc(*'mp4v'),
                 self.fps,
-                self.rgb_resolution
+                self.rgb_resolution,
+                self.writer_config
             )
             if not self.rgb_writer.isOpened():
                 raise IOError(f"Failed to initialize RGB video writer at {rgb_path}")
 
-            self.depth_writer = cv2.VideoWriter(
+            self.depth_writer = create_video_writer(
                 depth_path,
-                cv2.VideoWriter_fourcc(*'mp4v'),
                 self.fps,
-                self.rgb_resolution
+                self.rgb_resolution,
+                self.writer_config
             )
             if not self.depth_writer.isOpened():
                 self.rgb_writer.release()  # Clean up RGB writer if depth writer fails
@@ -86,6 +65,46 @@ class OakDCamera(OakDBase):
 
 
 
+    def process_frames(self, inRgb, inDepth):
+        """
+        Process and write one pair of RGB and depth packets
+        """
+        rgb_frame = inRgb.getCvFrame()
+        rgb_capture_time = self.capture_time(inRgb)
+        depth_capture_time = self.capture_time(inDepth)
+
+        # Raw frames go to local subscribers before any gating or overlays
+        if self.frame_bus is not None:
+            self.publish_frame("rgb", rgb_frame, inRgb, rgb_capture_time)
+            self.publish_frame("depth", inDepth.getFrame(), inDepth, depth_capture_time)
+
+        # Skip colorizing and encoding while the scene is static
+        if self.motion_gate is not None:
+            gate_frame = inDepth.getFrame() if self.motion_source == "depth" else rgb_frame
+            if not self.motion_gate.update(gate_frame):
+                return
+            started = time.perf_counter()
+
+        # Process frames
+        depth_frame = self.process_depth_frame(inDepth.getFrame())
+        
+        # Add timestamps
+        rgb_frame = self.add_timestamp(rgb_frame, rgb_capture_time)
+        depth_frame = self.add_timestamp(depth_frame, depth_capture_time)
+        
+        # Write frames
+        self.rgb_writer.write(rgb_frame)
+        self.depth_writer.write(depth_frame)
+        if self.motion_gate is not None:
+            self.motion_gate.add_processing_time(time.perf_counter() - started)
+        
+        self.frame_count += 1
+        if self.frame_count % 30 == 0:
+            logger.info(f"Recorded {self.frame_count} frames...")
+            summary = self.clock_summary()
+            if summary is not None:
+                logger.debug(summary)
+
     def record(self):
         logger.info(f"Starting camera test - will record {self.recording_time} seconds of RGB and Depth streams...")
 
@@ -93,30 +112,15 @@ class OakDCamera(OakDBase):
             logger.info('Connected cameras:', device.getConnectedCameras())
             
             # Output queues
-            qRgb = device.getOutputQueue(name="rgb", maxSize=4, blocking=False)
-            qDepth = device.getOutputQueue(name="depth", maxSize=4, blocking=False)
+            qRgb = device.getOutputQueue(name="rgb", maxSize=self.queue_size, blocking=False)
+            qDepth = device.getOutputQueue(name="depth", maxSize=self.queue_size, blocking=False)
             
             start_time = time.time()
             
             while time.time() - start_time < self.recording_time:
                 inRgb = qRgb.get()
                 inDepth = qDepth.get()
-
-                # Process frames
-                rgb_frame = inRgb.getCvFrame()
-                depth_frame = self.process_depth_frame(inDepth.getFrame())
-                
-                # Add timestamps
-                rgb_frame = self.add_timestamp(rgb_frame)
-                depth_frame = self.add_timestamp(depth_frame)
-                
-                # Write frames
-                self.rgb_writer.write(rgb_frame)
-                self.depth_writer.write(depth_frame)
-                
-                self.frame_count += 1
-                if self.frame_count % 30 == 0:
-                    logger.info(f"Recorded {self.frame_count} frames...")
+                self.process_frames(inRgb, inDepth)
 
             self.cleanup()
 
@@ -126,6 +130,10 @@ class OakDCamera(OakDBase):
             self.rgb_writer.release()
         if hasattr(self, 'depth_writer') and self.depth_writer is not None:
             self.depth_writer.release()
+        self.log_motion_savings([
+            os.path.join(self.output_path, self.config["output"]["rgb_filename"]),
+            os.path.join(self.output_path, self.config["output"]["depth_filename"])
+        ])
         
         super().cleanup(display)
         logger.debug(f"Saved RGB stream to '{self.config['output']['rgb_filename']}'")
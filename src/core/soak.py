@@ -0,0 +1,209 @@
+import copy
+import json
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np
+from loguru import logger
+
+from .detector import OakDObjectDetectionApp
+from .recorder import OakDCamera
+from src.utils.synthetic import SyntheticDevice, SyntheticFrameSource
+
+TARGETS = ("record", "detect")
+
+
+def current_rss_bytes():
+    """
+    Resident set size of this process. Uses /proc where available and
+    falls back to the peak RSS reported by getrusage.
+    """
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is kilobytes on Linux and bytes on macOS
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if os.uname().sysname == "Darwin" else maxrss * 1024
+
+
+def open_fd_count():
+    """
+    Number of open file descriptors, or None when it cannot be determined
+    """
+    for fd_dir in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(fd_dir))
+        except OSError:
+            continue
+    return None
+
+
+def _slope_per_hour(times, values):
+    if len(times) < 2:
+        return 0.0
+    return float(np.polyfit(np.asarray(times), np.asarray(values, dtype=np.float64), 1)[0]) * 3600
+
+
+def _rising_fraction(values):
+    deltas = np.diff(np.asarray(values, dtype=np.float64))
+    return float((deltas > 0).mean()) if len(deltas) else 0.0
+
+
+# Keys of the 'soak' config section passed to analyze_samples; others are ignored
+ANALYSIS_THRESHOLDS = ("max_rss_growth_mb_per_hour", "min_rss_growth_mb", "max_fps_drop", "min_samples")
+
+
+def analyze_samples(samples, max_rss_growth_mb_per_hour=50.0, min_rss_growth_mb=16.0, max_fps_drop=0.15, min_samples=4):
+    """
+    Flag monotonic memory growth, descriptor leaks and throughput decay in a
+    series of soak samples
+    """
+    flags = []
+    summary = {"samples": len(samples)}
+    if len(samples) < min_samples:
+        summary["flags"] = flags
+        summary["note"] = f"Need at least {min_samples} samples for trend analysis"
+        return summary
+
+    # Ignore the first sample: it includes warm-up allocations
+    samples = samples[1:]
+    times = [s["elapsed"] for s in samples]
+
+    rss_mb = [s["rss_bytes"] / 2**20 for s in samples]
+    summary["rss_start_mb"] = rss_mb[0]
+    summary["rss_end_mb"] = rss_mb[-1]
+    summary["rss_growth_mb_per_hour"] = _slope_per_hour(times, rss_mb)
+    summary["rss_rising_fraction"] = _rising_fraction(rss_mb)
+    # Short runs extrapolate small fluctuations into large hourly rates, so
+    # growth must also be significant in absolute terms
+    if (summary["rss_growth_mb_per_hour"] > max_rss_growth_mb_per_hour
+            and rss_mb[-1] - rss_mb[0] > min_rss_growth_mb
+            and summary["rss_rising_fraction"] >= 0.6):
+        flags.append("memory_growth")
+
+    fds = [s["open_fds"] for s in samples if s["open_fds"] is not None]
+    if len(fds) == len(samples):
+        summary["fd_start"] = fds[0]
+        summary["fd_end"] = fds[-1]
+        if fds[-1] > fds[0] and _rising_fraction(fds) >= 0.6:
+            flags.append("fd_growth")
+
+    fps = [s["fps"] for s in samples]
+    third = max(1, len(fps) // 3)
+    early, late = float(np.mean(fps[:third])), float(np.mean(fps[-third:]))
+    summary["fps_early"] = early
+    summary["fps_late"] = late
+    if early > 0 and (early - late) / early > max_fps_drop:
+        flags.append("throughput_decay")
+
+    summary["latency_p99_ms_max"] = max(s["latency_ms"]["p99"] for s in samples)
+    summary["flags"] = flags
+    return summary
+
+
+class SoakRunner:
+    """
+    Drive OakDCamera or OakDObjectDetectionApp from a synthetic frame source
+    for a fixed duration while sampling memory, descriptors and throughput
+    """
+    def __init__(self, target, config, duration, sample_interval=10.0, fps=0, save_video=False):
+        if target not in TARGETS:
+            raise ValueError(f"Unknown soak target '{target}', expected one of {', '.join(TARGETS)}")
+        self.target = target
+        self.config = copy.deepcopy(config)
+        self.duration = duration
+        self.sample_interval = sample_interval
+        self.fps = fps
+        self.save_video = save_video
+        self.samples = []
+
+    def _build(self, output_dir):
+        self.config["output"]["base_path"] = output_dir
+        if self.target == "record":
+            app = OakDCamera(self.config)
+            source = SyntheticFrameSource(rgb_size=app.rgb_resolution)
+            device = SyntheticDevice(source=source, fps=self.fps)
+            queues = (device.getOutputQueue("rgb"), device.getOutputQueue("depth"))
+            return app, lambda: app.process_frames(queues[0].get(), queues[1].get())
+
+        app = OakDObjectDetectionApp(
+            save_video=self.save_video,
+            output_path=os.path.join(output_dir, "object_detection.mp4"),
+            config=self.config,
+            build_pipeline=False
+        )
+        source = SyntheticFrameSource(rgb_size=app.preview_size, n_labels=len(app.labels))
+        device = SyntheticDevice(source=source, fps=self.fps)
+        queues = (device.getOutputQueue("rgb"), device.getOutputQueue("detections"))
+        return app, lambda: app.process_packets(queues[0].get(), queues[1].get())
+
+    def _sample(self, started, frames, latencies):
+        now = time.monotonic()
+        window = now - self._last_sample
+        self._last_sample = now
+        latencies_ms = np.asarray(latencies) * 1000 if latencies else np.zeros(1)
+        sample = {
+            "elapsed": now - started,
+            "frames": frames,
+            "fps": len(latencies) / window if window > 0 else 0.0,
+            "rss_bytes": current_rss_bytes(),
+            "open_fds": open_fd_count(),
+            "latency_ms": {
+                "p50": float(np.percentile(latencies_ms, 50)),
+                "p95": float(np.percentile(latencies_ms, 95)),
+                "p99": float(np.percentile(latencies_ms, 99)),
+                "max": float(latencies_ms.max()),
+            },
+        }
+        self.samples.append(sample)
+        logger.info(
+            f"Soak {sample['elapsed']:.0f}s: {sample['fps']:.1f} fps, "
+            f"RSS {sample['rss_bytes'] / 2**20:.1f} MiB, fds {sample['open_fds']}, "
+            f"p99 {sample['latency_ms']['p99']:.1f} ms"
+        )
+
+    def run(self):
+        """
+        Run the soak and return the report
+        """
+        with tempfile.TemporaryDirectory(prefix="oakd-soak-") as output_dir:
+            app, step = self._build(output_dir)
+            logger.info(f"Starting {self.duration}s soak of '{self.target}'")
+
+            frames = 0
+            latencies = []
+            started = self._last_sample = time.monotonic()
+            try:
+                while time.monotonic() - started < self.duration:
+                    t0 = time.perf_counter()
+                    step()
+                    latencies.append(time.perf_counter() - t0)
+                    frames += 1
+                    if time.monotonic() - self._last_sample >= self.sample_interval:
+                        self._sample(started, frames, latencies)
+                        latencies = []
+                if latencies:
+                    self._sample(started, frames, latencies)
+            finally:
+                app.cleanup(display=False)
+
+        return {
+            "target": self.target,
+            "duration": self.duration,
+            "sample_interval": self.sample_interval,
+            "frames": frames,
+            "summary": analyze_samples(self.samples, **{
+                key: value for key, value in self.config.get("soak", {}).items() if key in ANALYSIS_THRESHOLDS
+            }),
+            "samples": self.samples,
+        }
+
+    @staticmethod
+    def write_report(report, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Soak report written to {path}")
@@ -0,0 +1,152 @@
+import time
+
+import numpy as np
+
+
+class ClockSync:
+    """
+    Model of the device clock against host time.
+
+    Each observation pairs a packet's device timestamp with the host
+    monotonic time it was received. Receive time is capture time plus a
+    variable transport latency, so the fit uses the lower envelope of
+    (host - device): the minimum in each of several chronological segments
+    of a sliding window. A line through those minima gives the offset and
+    the drift (rate) of the device clock. A known minimum transport latency
+    can be given as latency_floor to remove the remaining bias.
+
+    The fit cannot see the fixed part of the transport delay, so the receive
+    delay it measures is relative: delay above the fastest delivery plus
+    latency_floor. End-to-end latency needs a host-synced capture timestamp
+    (dai.Clock.now() - packet.getTimestamp()) passed to observe().
+    """
+    def __init__(self, window=512, segments=16, refit_every=16, latency_floor=0.0,
+                 host_clock=time.monotonic, wall_clock=time.time):
+        self.window = window
+        self.segments = segments
+        self.refit_every = refit_every
+        self.latency_floor = latency_floor
+        self.host_clock = host_clock
+        self.wall_clock = wall_clock
+
+        self._device = np.zeros(window)
+        self._host = np.zeros(window)
+        self._count = 0
+        self._observed = 0
+        self._index = 0
+        self._device_ref = None
+        self._latencies = np.zeros(256)
+        self._latency_count = 0
+        self._delays = np.zeros(256)
+        self._delay_count = 0
+
+        self.offset = None
+        self.rate = 1.0
+        self.wall_offset = wall_clock() - host_clock()
+
+    @property
+    def synced(self):
+        return self.offset is not None
+
+    @property
+    def drift_ppm(self):
+        return (self.rate - 1.0) * 1e6
+
+    def observe(self, device_ts, host_ts=None, latency=None):
+        """
+        Add a (device timestamp, host receive time) pair, both in seconds,
+        with the packet's end-to-end latency if known. Returns the corrected
+        capture time on the host monotonic clock.
+        """
+        if host_ts is None:
+            host_ts = self.host_clock()
+            self.wall_offset = self.wall_clock() - host_ts
+        if self._device_ref is None:
+            self._device_ref = device_ts
+
+        self._device[self._index] = device_ts - self._device_ref
+        self._host[self._index] = host_ts
+        self._index = (self._index + 1) % self.window
+        self._count = min(self._count + 1, self.window)
+        self._observed += 1
+        # Refit on every sample while warming up, then periodically
+        if self._observed <= self.refit_every or self._observed % self.refit_every == 0:
+            self._fit()
+
+        capture = self.to_host(device_ts)
+        self._delays[self._delay_count % len(self._delays)] = host_ts - capture
+        self._delay_count += 1
+        if latency is not None:
+            self._latencies[self._latency_count % len(self._latencies)] = latency
+            self._latency_count += 1
+        return capture
+
+    def _fit(self):
+        n = self._count
+        if n == self.window:
+            device = np.roll(self._device, -self._index)
+            host = np.roll(self._host, -self._index)
+        else:
+            device = self._device[:n]
+            host = self._host[:n]
+
+        minima_device = []
+        minima_host = []
+        for indices in np.array_split(np.arange(n), min(self.segments, n)):
+            i = indices[np.argmin(host[indices] - device[indices])]
+            minima_device.append(device[i])
+            minima_host.append(host[i])
+
+        if len(minima_device) >= 2 and np.ptp(minima_device) > 0:
+            self.rate, self.offset = np.polyfit(minima_device, minima_host, 1)
+        else:
+            self.rate = 1.0
+            self.offset = float(np.min(host - device))
+
+    def to_host(self, device_ts):
+        """
+        Corrected capture time of a device timestamp on the host monotonic clock
+        """
+        if self.offset is None:
+            raise RuntimeError("ClockSync has no observations yet")
+        return self.offset + self.rate * (device_ts - self._device_ref) - self.latency_floor
+
+    def to_wall(self, device_ts):
+        """
+        Corrected capture time of a device timestamp as host wall time
+        """
+        return self.host_to_wall(self.to_host(device_ts))
+
+    def host_to_wall(self, host_ts):
+        return host_ts + self.wall_offset
+
+    def latency(self, device_ts, host_ts=None):
+        """
+        Time from the modelled capture of device_ts to host_ts (default: now),
+        in seconds. Relative: it excludes the fixed transport delay unless
+        latency_floor has been calibrated.
+        """
+        host_ts = self.host_clock() if host_ts is None else host_ts
+        return host_ts - self.to_host(device_ts)
+
+    @staticmethod
+    def _percentiles(values):
+        values = values * 1000
+        return {
+            "p50": float(np.percentile(values, 50)) if len(values) else None,
+            "p95": float(np.percentile(values, 95)) if len(values) else None,
+            "max": float(values.max()) if len(values) else None,
+        }
+
+    def stats(self):
+        """
+        Current clock model, recent end-to-end latency (from the latencies
+        given to observe) and recent relative receive delay
+        """
+        return {
+            "samples": self._count,
+            "offset": self.offset,
+            "drift_ppm": self.drift_ppm,
+            "latency_ms": self._percentiles(self._latencies[:min(self._latency_count, len(self._latencies))]),
+            "relative_delay_ms": self._percentiles(self._delays[:min(self._delay_count, len(self._delays))]),
+        }
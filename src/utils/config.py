@@ -1,6 +1,7 @@
+import copy
 import yaml
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from loguru import logger
 import os
 
@@ -9,7 +10,8 @@ class ConfigManager:
         "camera": {
             "rgb_resolution": [1280, 800],
             "fps": 30,
-            "recording_time": 10
+            "recording_time": 10,
+            "queue_size": 4  # Host-side output queue depth per stream
         },
         "output": {
             "base_path": "./data",
@@ -20,33 +22,212 @@ class ConfigManager:
             "colormap": "COLORMAP_JET",
             "normalize": True,
             "equalize_hist": True
+        },
+        "detection": {
+            "confidence_threshold": 0.5,
+            "sync_nn": True,  # Send the NN passthrough frame so boxes match the frame they were computed on
+            "preview_size": [304, 304]
+        },
+        "pipelines": {
+            # Declarative device pipelines, compiled by src.utils.pipeline_spec.
+            # '$section.key' values are read from the rest of the config. Links
+            # are [node.output, node.input], or {from, to, when/unless} to make
+            # a link conditional on a config value. Config files override parts
+            # of a spec rather than repeating it.
+            "preview": {
+                "nodes": {
+                    "camera": {"type": "ColorCamera", "preview_size": [640, 480], "interleaved": False, "fps": 30},
+                    "left": {"type": "MonoCamera", "resolution": "THE_400_P", "socket": "CAM_B"},
+                    "right": {"type": "MonoCamera", "resolution": "THE_400_P", "socket": "CAM_C"},
+                    "stereo": {"type": "StereoDepth", "preset": "HIGH_DENSITY"},
+                    "xout_rgb": {"type": "XLinkOut", "stream": "rgb"},
+                    "xout_depth": {"type": "XLinkOut", "stream": "depth"}
+                },
+                "links": [
+                    ["left.out", "stereo.left"],
+                    ["right.out", "stereo.right"],
+                    ["camera.preview", "xout_rgb.input"],
+                    ["stereo.depth", "xout_depth.input"]
+                ]
+            },
+            "record": {
+                "nodes": {
+                    "camera": {
+                        "type": "ColorCamera", "preview_size": "$camera.rgb_resolution", "fps": "$camera.fps",
+                        "interleaved": False, "color_order": "BGR"
+                    },
+                    "left": {"type": "MonoCamera", "resolution": "THE_400_P", "socket": "CAM_B"},
+                    "right": {"type": "MonoCamera", "resolution": "THE_400_P", "socket": "CAM_C"},
+                    "stereo": {"type": "StereoDepth", "preset": "DEFAULT", "depth_align": "CAM_A"},
+                    "xout_rgb": {"type": "XLinkOut", "stream": "rgb"},
+                    "xout_depth": {"type": "XLinkOut", "stream": "depth"}
+                },
+                "links": [
+                    ["camera.preview", "xout_rgb.input"],
+                    ["left.out", "stereo.left"],
+                    ["right.out", "stereo.right"],
+                    ["stereo.depth", "xout_depth.input"]
+                ]
+            },
+            "detection": {
+                "nodes": {
+                    "camera": {
+                        "type": "ColorCamera", "preview_size": "$detection.preview_size", "resolution": "THE_1080_P",
+                        "interleaved": False, "color_order": "BGR", "fps": "$camera.fps"
+                    },
+                    "nn": {
+                        "type": "MobileNetSpatialDetectionNetwork",
+                        "blob": {"zoo": "mobilenet-ssd", "shaves": 6},
+                        "confidence_threshold": "$detection.confidence_threshold",
+                        "input_blocking": False,
+                        "bounding_box_scale_factor": 0.5,
+                        "depth_lower_threshold": 100,
+                        "depth_upper_threshold": 5000
+                    },
+                    "left": {"type": "MonoCamera", "resolution": "THE_400_P", "socket": "CAM_B"},
+                    "right": {"type": "MonoCamera", "resolution": "THE_400_P", "socket": "CAM_C"},
+                    "stereo": {
+                        "type": "StereoDepth", "preset": "DEFAULT", "depth_align": "CAM_A",
+                        "output_size": "$detection.preview_size"
+                    },
+                    "xout_rgb": {"type": "XLinkOut", "stream": "rgb"},
+                    "xout_nn": {"type": "XLinkOut", "stream": "detections"},
+                    "xout_depth": {"type": "XLinkOut", "stream": "depth"}
+                },
+                "links": [
+                    ["camera.preview", "nn.input"],
+                    {"from": "nn.passthrough", "to": "xout_rgb.input", "when": "$detection.sync_nn"},
+                    {"from": "camera.preview", "to": "xout_rgb.input", "unless": "$detection.sync_nn"},
+                    ["nn.out", "xout_nn.input"],
+                    ["left.out", "stereo.left"],
+                    ["right.out", "stereo.right"],
+                    ["stereo.depth", "nn.inputDepth"],
+                    ["stereo.depth", "xout_depth.input"]
+                ]
+            }
+        },
+        "clock": {
+            "enabled": True,
+            "window": 512,  # Recent samples used to fit offset and drift
+            "latency_floor_ms": 0.0  # Known minimum transport latency, for packets without a host-synced timestamp
+        },
+        "motion": {
+            "enabled": False,
+            "source": "rgb",  # 'rgb' or 'depth' (recorder only)
+            "size": [64, 40],  # Downsampled size used for the change score
+            "on_threshold": 0.02,  # Score that marks the scene as moving
+            "off_threshold": 0.01,  # Score below which a moving scene starts to settle
+            "hold_frames": 15,  # Low-score frames before the scene counts as static
+            "keepalive_seconds": 1.0,  # Minimum output interval while static
+            "reference_alpha": 0.1  # Running-average rate of the reference frame
+        },
+        "frame_bus": {
+            "enabled": False,
+            "prefix": "oakd",  # Shared-memory names are '<prefix>-<stream>'
+            "slots": 8  # Frames kept per stream before the ring wraps
+        },
+        "writer": {
+            "backend": "opencv",  # 'opencv' or 'ffmpeg'
+            "fourcc": "mp4v",  # Used by the opencv backend
+            "ffmpeg": {
+                "binary": "ffmpeg",
+                "codec": "libx264",  # libx264 or libx265
+                "preset": "veryfast",
+                "crf": 23,
+                "pix_fmt": "yuv420p",
+                "threads": 0  # 0 lets ffmpeg pick
+            }
+        },
+        "process": {
+            "workers": 0,  # 0 means one worker per CPU core
+            "chunk_frames": 900,
+            "source_colormap": "COLORMAP_JET",
+            "output_dirname": "processed"
+        },
+        "analytics": {
+            "enabled": True,
+            "windows": [10, 60, 3600],  # Sliding window lengths in seconds
+            "buckets": 60,  # Ring buckets per window
+            "log_interval": 10,  # Seconds between snapshot logs/metrics writes
+            "metrics_path": None,  # JSON file updated with each snapshot
+            "show_in_panel": False
+        },
+        "roi_capture": {
+            "enabled": False,
+            "interval_frames": 10,  # Minimum sensor frames between full-resolution frames sent to the host
+            "min_confidence": 0.5,  # Detections below this are not cropped
+            "margin": 0.15,  # Context added around each box, as a fraction of its size
+            "min_size": 64,  # Minimum crop side in full-resolution pixels
+            "max_frame_gap": 2,  # Largest sequence gap allowed when pairing a frame with detections
+            "jpeg_quality": 90,
+            "dirname": "crops"  # Archive directory under the output path
+        },
+        "offline_detection": {
+            "model_path": None,  # ONNX, OpenVINO IR (.xml) or Caffe export of mobilenet-ssd
+            "config_path": None,  # Companion file (.bin weights or .prototxt) if the format needs one
+            "input_size": [300, 300],
+            "scale": 0.007843,  # Preprocessing for exports without mean/scale baked in
+            "mean": [127.5, 127.5, 127.5],
+            "swap_rb": False,
+            "batch_size": 8,
+            "workers": 1,  # Inference threads (0 means one per CPU core); cv2.dnn threads a single one internally
+            "confidence_threshold": 0.5,
+            "output_suffix": ".detections.jsonl"
+        },
+        "daemon": {
+            "socket_path": "/tmp/oakd-daemon.sock"
+        },
+        "autotune": {
+            "duration": 5,  # Seconds per trial
+            "replay_frames": 60,  # Frames held in memory and replayed in a loop
+            "max_drop_rate": 0.01,  # Trials dropping more frames than this are only picked if none keep up
+            "grid": {
+                "camera.fps": [15, 30, 60],
+                "camera.rgb_resolution": [[1280, 800], [640, 400]],
+                "camera.queue_size": [2, 4, 8],
+                "writer.backend": ["opencv"]
+            }
+        },
+        "soak": {
+            "max_rss_growth_mb_per_hour": 50.0,
+            "min_rss_growth_mb": 16.0,
+            "max_fps_drop": 0.15  # Fractional fps drop from the first to the last third
         }
     }
 
     @staticmethod
-    def load_config(config_path: Optional[str] = None) -> Dict[str, Any]:
+    def load_config(config_path: Optional[str] = None, overlay_paths: Optional[List[str]] = None) -> Dict[str, Any]:
         """
-        Load configuration from a file or return defaults.
+        Load configuration from a file or return defaults. Overlay files
+        (e.g. written by autotune) are applied on top, in order.
         """
-        config = ConfigManager.DEFAULT_CONFIG.copy()
+        config = copy.deepcopy(ConfigManager.DEFAULT_CONFIG)
         
-        if config_path:
-            path = Path(config_path)
-            if path.exists():
-                try:
-                    with open(path, 'r') as f:
-                        user_config = yaml.safe_load(f)
-                        if user_config:
-                            ConfigManager._update_recursive(config, user_config)
-                    logger.info(f"Loaded configuration from {config_path}")
-                except Exception as e:
-                    logger.error(f"Error loading config from {config_path}: {e}")
-                    raise
-            else:
-                logger.warning(f"Config file {config_path} not found. Using defaults.")
+        for path in [config_path, *(overlay_paths or [])]:
+            if path:
+                ConfigManager._load_file(config, path)
         
         return config
 
+    @staticmethod
+    def _load_file(config: Dict, config_path: str) -> None:
+        """
+        Merge a YAML file into config in place.
+        """
+        path = Path(config_path)
+        if path.exists():
+            try:
+                with open(path, 'r') as f:
+                    user_config = yaml.safe_load(f)
+                    if user_config:
+                        ConfigManager._update_recursive(config, user_config)
+                logger.info(f"Loaded configuration from {config_path}")
+            except Exception as e:
+                logger.error(f"Error loading config from {config_path}: {e}")
+                raise
+        else:
+            logger.warning(f"Config file {config_path} not found. Using defaults.")
+
     @staticmethod
     def _update_recursive(d: Dict, u: Dict) -> Dict:
         """
@@ -60,9 +241,11 @@ class ConfigManager:
         return d
 
     @staticmethod
-    def create_config_from_args(output_dir: Path, duration: int, fps: int, rgb_res: list = [1280, 800]) -> Dict[str, Any]:
+    def create_config_from_args(output_dir: Path, duration: int, fps: int, rgb_res: list = [1280, 800],
+                                overlay_paths: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         Creates a config dictionary from CLI arguments, overriding defaults.
+        Overlay files are applied on top of the arguments, in order.
         """
         config = ConfigManager.DEFAULT_CONFIG.copy()
         
@@ -76,5 +259,8 @@ class ConfigManager:
         config["camera"]["recording_time"] = duration
         config["camera"]["fps"] = fps
         config["camera"]["rgb_resolution"] = rgb_res
+
+        for path in overlay_paths or []:
+            ConfigManager._load_file(config, path)
         
         return config
@@ -0,0 +1,105 @@
+import json
+import os
+
+import cv2
+
+
+def preview_to_full(bbox, preview_size, full_size, keep_aspect=True):
+    """
+    Map a normalized (xmin, ymin, xmax, ymax) box on the NN preview to pixel
+    coordinates on the full-resolution frame. With keep_aspect (the
+    ColorCamera default) the preview is a center crop of the full frame with
+    the preview's aspect ratio; without it the preview is a plain resize.
+    """
+    full_w, full_h = full_size
+    preview_w, preview_h = preview_size
+    if keep_aspect:
+        crop_w = min(full_w, full_h * preview_w / preview_h)
+        crop_h = min(full_h, full_w * preview_h / preview_w)
+    else:
+        crop_w, crop_h = full_w, full_h
+    x0 = (full_w - crop_w) / 2
+    y0 = (full_h - crop_h) / 2
+
+    xmin, ymin, xmax, ymax = (min(max(v, 0.0), 1.0) for v in bbox)
+    return (
+        x0 + xmin * crop_w,
+        y0 + ymin * crop_h,
+        x0 + xmax * crop_w,
+        y0 + ymax * crop_h,
+    )
+
+
+def expand_box(box, full_size, margin=0.15, min_size=32):
+    """
+    Grow a pixel box by a margin on each side (as a fraction of its size) and
+    to at least min_size, then clip it to the frame. Returns integer
+    (x1, y1, x2, y2), or None if nothing is left after clipping.
+    """
+    full_w, full_h = full_size
+    x1, y1, x2, y2 = box
+    cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+    w = max((x2 - x1) * (1 + 2 * margin), min_size)
+    h = max((y2 - y1) * (1 + 2 * margin), min_size)
+
+    x1 = int(max(0, round(cx - w / 2)))
+    y1 = int(max(0, round(cy - h / 2)))
+    x2 = int(min(full_w, round(cx + w / 2)))
+    y2 = int(min(full_h, round(cy + h / 2)))
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return x1, y1, x2, y2
+
+
+class CropArchive:
+    """
+    Directory of JPEG object crops plus an index.jsonl with one record per
+    crop (source frame, box, label and whatever the caller adds)
+    """
+    def __init__(self, path, jpeg_quality=90):
+        self.path = str(path)
+        self.jpeg_quality = jpeg_quality
+        os.makedirs(self.path, exist_ok=True)
+        self.index_path = os.path.join(self.path, "index.jsonl")
+        self._index = open(self.index_path, 'a')
+        self.crops = 0
+        self.bytes_written = 0
+
+    def add(self, frame, box, record):
+        """
+        Save frame[box] as a JPEG and append its index record. Returns the
+        record written, with 'file', 'box' and 'size' filled in, or None if
+        the crop could not be encoded.
+        """
+        x1, y1, x2, y2 = box
+        ok, encoded = cv2.imencode(".jpg", frame[y1:y2, x1:x2], [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            return None
+
+        name = f"{record.get('sequence', 0):08d}_{self.crops:06d}"
+        if "label_name" in record:
+            name += f"_{record['label_name']}"
+        filename = f"{name}.jpg"
+        data = encoded.tobytes()
+        with open(os.path.join(self.path, filename), 'wb') as f:
+            f.write(data)
+
+        record = {**record, "file": filename, "box": [x1, y1, x2, y2], "size": [x2 - x1, y2 - y1]}
+        self._index.write(json.dumps(record) + "\n")
+        self._index.flush()
+        self.crops += 1
+        self.bytes_written += len(data)
+        return record
+
+    def close(self):
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+
+    @staticmethod
+    def read_index(path):
+        """
+        Records of an archive directory, in the order they were written
+        """
+        with open(os.path.join(str(path), "index.jsonl")) as f:
+            return [json.loads(line) for line in f if line.strip()]
@@ -0,0 +1,300 @@
+import os
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+MAGIC = 0x4F414B42  # 'OAKB'
+VERSION = 2
+MAX_DIMS = 4
+
+# Bus header, followed by one slot header per slot, followed by the slot data.
+# Each slot header is a seqlock: 'lock' is odd while the slot is being written
+# and 2 * n once publication n has been written to it.
+BUS_HEADER = np.dtype([
+    ("magic", "<u4"),
+    ("version", "<u4"),
+    ("pid", "<u4"),  # Producer process, used to tell a stale segment from a live one
+    ("slot_count", "<u4"),
+    ("slot_bytes", "<u8"),
+    ("head", "<u8"),  # Number of frames published so far
+], align=True)
+
+SLOT_HEADER = np.dtype([
+    ("lock", "<u8"),
+    ("sequence", "<u8"),  # Producer's frame sequence number
+    ("device_timestamp", "<f8"),
+    ("host_timestamp", "<f8"),
+    ("ndim", "<u4"),
+    ("shape", "<u4", (MAX_DIMS,)),
+    ("dtype", "S8"),
+    ("nbytes", "<u8"),
+], align=True)
+
+ALIGNMENT = 64
+
+
+def _aligned(size):
+    return (size + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _layout(slot_count, slot_bytes):
+    """Offsets of the slot headers and slot data, and the total segment size"""
+    headers_offset = _aligned(BUS_HEADER.itemsize)
+    data_offset = _aligned(headers_offset + SLOT_HEADER.itemsize * slot_count)
+    slot_stride = _aligned(slot_bytes)
+    return headers_offset, data_offset, slot_stride, data_offset + slot_stride * slot_count
+
+
+def _attach(name):
+    """
+    Attach to an existing segment without registering it with the resource
+    tracker, which would otherwise unlink it when this process exits
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _owner_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Exists, owned by another user
+    return True
+
+
+def _reclaim(name):
+    """
+    Unlink a segment left behind by a producer that did not shut down
+    cleanly. Raises FileExistsError if the segment is not a frame bus of this
+    version or its producer is still running.
+    """
+    stale = _attach(name)
+    try:
+        pid = None
+        if stale.size >= BUS_HEADER.itemsize:
+            header = np.ndarray((), dtype=BUS_HEADER, buffer=stale.buf)
+            if int(header["magic"]) == MAGIC and int(header["version"]) == VERSION:
+                pid = int(header["pid"])
+            del header
+        if pid is None or _owner_alive(pid):
+            owner = "an unknown process" if pid is None else f"process {pid}"
+            raise FileExistsError(f"Shared memory '{name}' is in use by {owner}")
+    finally:
+        stale.close()
+    stale.unlink()
+
+
+class BusFrame:
+    """
+    A frame read from the bus. 'array' is a view into shared memory: it stays
+    valid until the producer wraps around the ring and reuses the slot, which
+    valid() reports. Copy it (or check valid() after use) if it must outlive
+    that window.
+    """
+    __slots__ = ("array", "sequence", "device_timestamp", "host_timestamp", "index", "_header", "_lock")
+
+    def __init__(self, array, sequence, device_timestamp, host_timestamp, index, header, lock):
+        self.array = array
+        self.sequence = sequence
+        self.device_timestamp = device_timestamp
+        self.host_timestamp = host_timestamp
+        self.index = index
+        self._header = header
+        self._lock = lock
+
+    def valid(self):
+        return int(self._header["lock"]) == self._lock
+
+
+class FramePublisher:
+    """
+    Write frames into a named shared-memory ring. Publishing never waits on
+    readers: a slot is simply overwritten once the ring wraps, and readers
+    detect that through the slot's seqlock.
+    """
+    def __init__(self, name, slot_bytes, slot_count=8):
+        if slot_count < 2:
+            raise ValueError("A frame bus needs at least 2 slots")
+        self.name = name
+        self.slot_count = slot_count
+        self.slot_bytes = int(slot_bytes)
+        headers_offset, data_offset, self._slot_stride, size = _layout(slot_count, self.slot_bytes)
+
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            _reclaim(name)
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        self._header = np.ndarray((), dtype=BUS_HEADER, buffer=self.shm.buf)
+        self._slots = np.ndarray((slot_count,), dtype=SLOT_HEADER, buffer=self.shm.buf, offset=headers_offset)
+        self._data = np.ndarray((slot_count, self._slot_stride), dtype=np.uint8, buffer=self.shm.buf, offset=data_offset)
+        self._slots[:] = np.zeros((), dtype=SLOT_HEADER)
+        self._header["slot_count"] = slot_count
+        self._header["slot_bytes"] = self.slot_bytes
+        self._header["head"] = 0
+        self._header["pid"] = os.getpid()
+        self._header["version"] = VERSION
+        self._header["magic"] = MAGIC  # Written last: readers check it to see the bus is ready
+        self.published = 0
+
+    def publish(self, frame, sequence=None, device_timestamp=0.0, host_timestamp=None):
+        """
+        Copy a frame into the next slot and make it visible to readers
+        """
+        frame = np.ascontiguousarray(frame)
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame of {frame.nbytes} bytes does not fit {self.slot_bytes}-byte slots of '{self.name}'")
+        if frame.ndim > MAX_DIMS:
+            raise ValueError(f"Frames may have at most {MAX_DIMS} dimensions")
+
+        n = self.published + 1
+        index = (n - 1) % self.slot_count
+        slot = self._slots[index]
+        slot["lock"] = 2 * n - 1
+        slot["sequence"] = n if sequence is None else sequence
+        slot["device_timestamp"] = device_timestamp
+        slot["host_timestamp"] = time.time() if host_timestamp is None else host_timestamp
+        slot["ndim"] = frame.ndim
+        slot["shape"] = frame.shape + (0,) * (MAX_DIMS - frame.ndim)
+        slot["dtype"] = frame.dtype.str.encode()
+        slot["nbytes"] = frame.nbytes
+        self._data[index, :frame.nbytes] = frame.reshape(-1).view(np.uint8)
+        slot["lock"] = 2 * n
+        self._header["head"] = n
+        self.published = n
+
+    def close(self):
+        """
+        Remove the segment. Attached readers keep their mapping until they close.
+        """
+        if self.shm is None:
+            return
+        del self._header, self._slots, self._data
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = None
+
+
+class FrameBusReader:
+    """
+    Attach to a bus by name and read frames as zero-copy NumPy views. Any
+    number of readers can attach and detach while the producer runs.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.shm = _attach(name)
+        self._header = np.ndarray((), dtype=BUS_HEADER, buffer=self.shm.buf)
+        if int(self._header["magic"]) != MAGIC or int(self._header["version"]) != VERSION:
+            self.close()
+            raise ValueError(f"'{name}' is not a version {VERSION} frame bus")
+        self.slot_count = int(self._header["slot_count"])
+        self.slot_bytes = int(self._header["slot_bytes"])
+        headers_offset, data_offset, slot_stride, _ = _layout(self.slot_count, self.slot_bytes)
+        self._slots = np.ndarray((self.slot_count,), dtype=SLOT_HEADER, buffer=self.shm.buf, offset=headers_offset)
+        self._data = np.ndarray((self.slot_count, slot_stride), dtype=np.uint8, buffer=self.shm.buf, offset=data_offset)
+
+        # Start from the current head: only frames published after attaching are read
+        self.last_index = int(self._header["head"])
+        self.missed = 0
+
+    @property
+    def head(self):
+        return int(self._header["head"])
+
+    def _read(self, n):
+        """Read publication n, or None if its slot has been (or is being) reused"""
+        index = (n - 1) % self.slot_count
+        header = self._slots[index]
+        lock = 2 * n
+        if int(header["lock"]) != lock:
+            return None
+        ndim = int(header["ndim"])
+        shape = tuple(int(d) for d in header["shape"][:ndim])
+        dtype = np.dtype(header["dtype"].decode())
+        array = self._data[index, :int(header["nbytes"])].view(dtype).reshape(shape)
+        frame = BusFrame(
+            array, int(header["sequence"]), float(header["device_timestamp"]),
+            float(header["host_timestamp"]), n, header, lock
+        )
+        # The producer may have started rewriting the slot while the header was read
+        return frame if frame.valid() else None
+
+    def latest(self, retries=100, poll_interval=0.0001):
+        """
+        Most recently published frame, or None if nothing has been published
+        or every attempt raced the producer rewriting the slot
+        """
+        for _ in range(retries):
+            head = self.head
+            if head == 0:
+                return None
+            frame = self._read(head)
+            if frame is not None:
+                self.last_index = head
+                return frame
+            time.sleep(poll_interval)
+        return None
+
+    def next(self, timeout=None, poll_interval=0.001):
+        """
+        Next frame after the last one read, waiting up to timeout seconds
+        (forever if None). A reader that falls more than a ring behind skips
+        ahead and counts the frames it missed.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            head = self.head
+            if head > self.last_index:
+                # Oldest publication whose slot cannot be mid-rewrite
+                oldest = max(self.last_index + 1, head - self.slot_count + 2)
+                for n in range(oldest, head + 1):
+                    frame = self._read(n)
+                    if frame is not None:
+                        self.missed += n - self.last_index - 1
+                        self.last_index = n
+                        return frame
+                continue
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(poll_interval)
+
+    def close(self):
+        if self.shm is None:
+            return
+        self._header = self._slots = self._data = None
+        self.shm.close()
+        self.shm = None
+
+
+class FrameBus:
+    """
+    Set of publishers, one shared-memory ring per stream, created on the
+    first frame of each stream and sized from it
+    """
+    def __init__(self, prefix="oakd", slot_count=8):
+        self.prefix = prefix
+        self.slot_count = slot_count
+        self.publishers = {}
+
+    def stream_name(self, stream):
+        return f"{self.prefix}-{stream}"
+
+    def publish(self, stream, frame, sequence=None, device_timestamp=0.0, host_timestamp=None):
+        publisher = self.publishers.get(stream)
+        if publisher is None:
+            publisher = FramePublisher(self.stream_name(stream), frame.nbytes, self.slot_count)
+            self.publishers[stream] = publisher
+        publisher.publish(frame, sequence, device_timestamp, host_timestamp)
+
+    def close(self):
+        for publisher in self.publishers.values():
+            publisher.close()
+        self.publishers = {}
@@ -0,0 +1,130 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    Decide per frame whether the expensive stages (colorize, annotate,
+    encode) should run, based on a cheap change score.
+
+    The score is the mean absolute difference between a heavily downsampled
+    grayscale copy of the frame and a running-average reference, as a
+    fraction of full scale. All buffers are allocated once. Hysteresis
+    (separate on/off thresholds plus a hold period) stops the gate from
+    flickering, and a keep-alive interval guarantees a minimum output rate
+    while the scene is static.
+    """
+    def __init__(self, size=(64, 40), on_threshold=0.02, off_threshold=0.01, hold_frames=15,
+                 keepalive_seconds=1.0, reference_alpha=0.1, depth_max_mm=5000, clock=time.monotonic):
+        self.size = tuple(size)
+        self.on_threshold = on_threshold
+        self.off_threshold = off_threshold
+        self.hold_frames = hold_frames
+        self.keepalive_seconds = keepalive_seconds
+        self.reference_alpha = reference_alpha
+        self.depth_scale = 255.0 / depth_max_mm
+        self.clock = clock
+
+        w, h = self.size
+        self._small = None
+        self._gray = np.zeros((h, w), dtype=np.uint8)
+        self._gray_f = np.zeros((h, w), dtype=np.float32)
+        self._diff = np.zeros((h, w), dtype=np.float32)
+        self._reference = np.zeros((h, w), dtype=np.float32)
+        self._has_reference = False
+
+        self.active = True
+        self._hold = hold_frames
+        self._last_pass = None
+        self.last_score = 0.0
+        self.passing = True
+
+        self.frames_seen = 0
+        self.frames_passed = 0
+        self.processing_seconds = 0.0
+
+    def score(self, frame):
+        """
+        Change score of a BGR, grayscale or uint16 depth frame against the reference
+        """
+        if self._small is None or self._small.shape[2:] != frame.shape[2:] or self._small.dtype != frame.dtype:
+            w, h = self.size
+            self._small = np.zeros((h, w) + frame.shape[2:], dtype=frame.dtype)
+        cv2.resize(frame, self.size, dst=self._small, interpolation=cv2.INTER_AREA)
+
+        if self._small.ndim == 3:
+            cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        elif self._small.dtype == np.uint8:
+            np.copyto(self._gray, self._small)
+        else:
+            # Depth in millimetres: map the working range onto 8 bits
+            cv2.convertScaleAbs(self._small, dst=self._gray, alpha=self.depth_scale)
+
+        np.copyto(self._gray_f, self._gray, casting='unsafe')
+        if not self._has_reference:
+            np.copyto(self._reference, self._gray_f)
+            self._has_reference = True
+            return 1.0
+
+        cv2.absdiff(self._gray_f, self._reference, dst=self._diff)
+        cv2.accumulateWeighted(self._gray_f, self._reference, self.reference_alpha)
+        return float(cv2.mean(self._diff)[0]) / 255.0
+
+    def update(self, frame, now=None):
+        """
+        Score a frame and return True if the expensive stages should run for it
+        """
+        now = self.clock() if now is None else now
+        self.frames_seen += 1
+        self.last_score = self.score(frame)
+
+        if self.last_score >= self.on_threshold:
+            self.active = True
+            self._hold = self.hold_frames
+        elif self.active and self.last_score < self.off_threshold:
+            self._hold -= 1
+            if self._hold <= 0:
+                self.active = False
+
+        keepalive = self._last_pass is None or now - self._last_pass >= self.keepalive_seconds
+        self.passing = self.active or keepalive
+        if self.passing:
+            self._last_pass = now
+            self.frames_passed += 1
+        return self.passing
+
+    def repeat(self):
+        """
+        Apply the last decision to an update that brings no new frame, such as
+        new detections for the current one, without rescoring
+        """
+        self.frames_seen += 1
+        if self.passing:
+            self.frames_passed += 1
+        return self.passing
+
+    def add_processing_time(self, seconds):
+        """
+        Account time spent in the gated stages, used to estimate savings
+        """
+        self.processing_seconds += seconds
+
+    def report(self, bytes_written=None):
+        """
+        Summarize frames skipped and the estimated CPU time and bytes saved
+        """
+        skipped = self.frames_seen - self.frames_passed
+        per_frame = self.processing_seconds / self.frames_passed if self.frames_passed else 0.0
+        report = {
+            "frames_seen": self.frames_seen,
+            "frames_processed": self.frames_passed,
+            "frames_skipped": skipped,
+            "skipped_fraction": skipped / self.frames_seen if self.frames_seen else 0.0,
+            "cpu_seconds_saved": skipped * per_frame,
+        }
+        if bytes_written is not None and self.frames_passed:
+            report["bytes_written"] = bytes_written
+            report["bytes_saved"] = int(bytes_written / self.frames_passed * skipped)
+        return report
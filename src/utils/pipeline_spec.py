@@ -0,0 +1,287 @@
+import copy
+
+import blobconverter
+import depthai as dai
+
+from src.utils.config import ConfigManager
+
+
+class PipelineSpecError(ValueError):
+    """Raised when a pipeline spec does not describe a valid pipeline"""
+
+
+def _enum(path):
+    """Look up a depthai enum class from a dotted path such as 'node.StereoDepth.PresetMode'"""
+    def lookup():
+        value = dai
+        for part in path.split("."):
+            value = getattr(value, part)
+        return value
+    return lookup
+
+
+SENSOR_RESOLUTION = _enum("ColorCameraProperties.SensorResolution")
+MONO_RESOLUTION = _enum("MonoCameraProperties.SensorResolution")
+COLOR_ORDER = _enum("ColorCameraProperties.ColorOrder")
+BOARD_SOCKET = _enum("CameraBoardSocket")
+STEREO_PRESET = _enum("node.StereoDepth.PresetMode")
+
+
+def _pair(value):
+    return isinstance(value, (list, tuple)) and len(value) == 2 and all(
+        isinstance(v, int) and not isinstance(v, bool) and v > 0 for v in value
+    )
+
+
+def _number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _blob(value):
+    if isinstance(value, str):
+        return True
+    return isinstance(value, dict) and isinstance(value.get("zoo"), str) and set(value) <= {"zoo", "shaves"}
+
+
+# Property kinds: a validator and, for enums, the depthai enum the name is looked up in
+BOOL = (lambda v: isinstance(v, bool), None)
+NUMBER = (_number, None)
+PAIR = (_pair, None)
+STRING = (lambda v: isinstance(v, str) and v != "", None)
+BLOB = (_blob, None)
+
+
+def ENUM(lookup):
+    return (lambda v: isinstance(v, str) and v in lookup().__members__, lookup)
+
+
+_DETECTION_NETWORK = {
+    "blob": (BLOB, lambda n, v: n.setBlobPath(v)),
+    "confidence_threshold": (NUMBER, lambda n, v: n.setConfidenceThreshold(v)),
+    "input_blocking": (BOOL, lambda n, v: n.input.setBlocking(v)),
+}
+_SPATIAL = {
+    "bounding_box_scale_factor": (NUMBER, lambda n, v: n.setBoundingBoxScaleFactor(v)),
+    "depth_lower_threshold": (NUMBER, lambda n, v: n.setDepthLowerThreshold(int(v))),
+    "depth_upper_threshold": (NUMBER, lambda n, v: n.setDepthUpperThreshold(int(v))),
+}
+
+# Supported node types: their ports and the properties a spec may set, each
+# with its kind and setter
+NODE_TYPES = {
+    "ColorCamera": {
+        "inputs": ("inputConfig", "inputControl"),
+        "outputs": ("preview", "video", "isp", "still", "raw"),
+        "properties": {
+            "preview_size": (PAIR, lambda n, v: n.setPreviewSize(*v)),
+            "video_size": (PAIR, lambda n, v: n.setVideoSize(*v)),
+            "resolution": (ENUM(SENSOR_RESOLUTION), lambda n, v: n.setResolution(v)),
+            "interleaved": (BOOL, lambda n, v: n.setInterleaved(v)),
+            "color_order": (ENUM(COLOR_ORDER), lambda n, v: n.setColorOrder(v)),
+            "fps": (NUMBER, lambda n, v: n.setFps(v)),
+            "socket": (ENUM(BOARD_SOCKET), lambda n, v: n.setBoardSocket(v)),
+            "preview_keep_aspect_ratio": (BOOL, lambda n, v: n.setPreviewKeepAspectRatio(v)),
+        },
+    },
+    "MonoCamera": {
+        "inputs": ("inputControl",),
+        "outputs": ("out", "raw"),
+        "properties": {
+            "resolution": (ENUM(MONO_RESOLUTION), lambda n, v: n.setResolution(v)),
+            "socket": (ENUM(BOARD_SOCKET), lambda n, v: n.setBoardSocket(v)),
+            "fps": (NUMBER, lambda n, v: n.setFps(v)),
+        },
+    },
+    "StereoDepth": {
+        "inputs": ("left", "right", "inputConfig"),
+        "outputs": ("depth", "disparity", "rectifiedLeft", "rectifiedRight", "syncedLeft", "syncedRight", "confidenceMap"),
+        "properties": {
+            "preset": (ENUM(STEREO_PRESET), lambda n, v: n.setDefaultProfilePreset(v)),
+            "depth_align": (ENUM(BOARD_SOCKET), lambda n, v: n.setDepthAlign(v)),
+            # Stereo output dimensions must be multiples of 16
+            "output_size": (PAIR, lambda n, v: n.setOutputSize(v[0] // 16 * 16, v[1] // 16 * 16)),
+            "left_right_check": (BOOL, lambda n, v: n.setLeftRightCheck(v)),
+            "subpixel": (BOOL, lambda n, v: n.setSubpixel(v)),
+            "extended_disparity": (BOOL, lambda n, v: n.setExtendedDisparity(v)),
+        },
+    },
+    "MobileNetDetectionNetwork": {
+        "inputs": ("input",),
+        "outputs": ("out", "passthrough"),
+        "properties": dict(_DETECTION_NETWORK),
+    },
+    "MobileNetSpatialDetectionNetwork": {
+        "inputs": ("input", "inputDepth"),
+        "outputs": ("out", "passthrough", "passthroughDepth", "boundingBoxMapping"),
+        "properties": {**_DETECTION_NETWORK, **_SPATIAL},
+    },
+    "XLinkOut": {
+        "inputs": ("input",),
+        "outputs": (),
+        "properties": {
+            "stream": (STRING, lambda n, v: n.setStreamName(v)),
+        },
+        "required": ("stream",),
+    },
+}
+
+
+def _lookup(config, dotted_key):
+    value = config
+    for key in dotted_key.split("."):
+        if not isinstance(value, dict) or key not in value:
+            raise PipelineSpecError(f"Unknown config reference '${dotted_key}'")
+        value = value[key]
+    return value
+
+
+def _substitute(value, config):
+    if isinstance(value, str) and value.startswith("$"):
+        return _lookup(config, value[1:])
+    if isinstance(value, dict):
+        return {k: _substitute(v, config) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_substitute(v, config) for v in value]
+    return value
+
+
+def resolve_spec(spec, config):
+    """
+    Substitute '$section.key' references with config values and drop links
+    whose 'when' / 'unless' condition does not hold. The result depends only
+    on the spec and the config values it references.
+    """
+    spec = _substitute(copy.deepcopy(spec), config)
+    links = []
+    for link in spec.get("links", []):
+        if isinstance(link, dict):
+            if "when" in link and not link["when"]:
+                continue
+            if "unless" in link and link["unless"]:
+                continue
+            link = [link.get("from"), link.get("to")]
+        links.append(link)
+    return {"nodes": spec.get("nodes", {}), "links": links}
+
+
+def _endpoint(value):
+    if not isinstance(value, str) or value.count(".") != 1:
+        return None, None
+    return tuple(value.split("."))
+
+
+def validate_spec(spec):
+    """
+    Check a resolved spec and return its normalized plan: nodes in creation
+    order with their type and properties, and links as (node, port, node,
+    port). Raises PipelineSpecError listing every problem found.
+    """
+    errors = []
+    nodes = spec.get("nodes")
+    if not isinstance(nodes, dict) or not nodes:
+        raise PipelineSpecError("Pipeline spec has no nodes")
+
+    plan_nodes = []
+    for name, node in nodes.items():
+        if not isinstance(node, dict) or node.get("type") not in NODE_TYPES:
+            errors.append(f"Node '{name}': unknown type {node.get('type') if isinstance(node, dict) else node!r}")
+            continue
+        node_type = NODE_TYPES[node["type"]]
+        properties = {k: v for k, v in node.items() if k != "type"}
+        for key, value in properties.items():
+            if key not in node_type["properties"]:
+                errors.append(f"Node '{name}': unknown property '{key}' for {node['type']}")
+                continue
+            (check, _), _ = node_type["properties"][key]
+            if not check(value):
+                errors.append(f"Node '{name}': invalid value {value!r} for '{key}'")
+        for key in node_type.get("required", ()):
+            if key not in properties:
+                errors.append(f"Node '{name}': missing required property '{key}'")
+        plan_nodes.append({"name": name, "type": node["type"], "properties": properties})
+
+    plan_links = []
+    linked_inputs = set()
+    for link in spec.get("links", []):
+        if not isinstance(link, (list, tuple)) or len(link) != 2:
+            errors.append(f"Link {link!r}: expected [node.output, node.input]")
+            continue
+        (src, out), (dst, inp) = _endpoint(link[0]), _endpoint(link[1])
+        if src not in nodes or dst not in nodes:
+            errors.append(f"Link {link[0]} -> {link[1]}: unknown node")
+            continue
+        src_type, dst_type = NODE_TYPES.get(nodes[src].get("type")), NODE_TYPES.get(nodes[dst].get("type"))
+        if src_type is None or dst_type is None:
+            continue  # Already reported as an unknown type
+        if out not in src_type["outputs"]:
+            errors.append(f"Link {link[0]} -> {link[1]}: {nodes[src]['type']} has no output '{out}'")
+            continue
+        if inp not in dst_type["inputs"]:
+            errors.append(f"Link {link[0]} -> {link[1]}: {nodes[dst]['type']} has no input '{inp}'")
+            continue
+        if (dst, inp) in linked_inputs:
+            errors.append(f"Link {link[0]} -> {link[1]}: input already linked")
+            continue
+        linked_inputs.add((dst, inp))
+        plan_links.append([src, out, dst, inp])
+
+    streams = [n["properties"].get("stream") for n in plan_nodes if n["type"] == "XLinkOut"]
+    for stream in {s for s in streams if streams.count(s) > 1}:
+        errors.append(f"Stream name '{stream}' is used more than once")
+
+    if errors:
+        raise PipelineSpecError("Invalid pipeline spec:\n  " + "\n  ".join(errors))
+    return {"nodes": plan_nodes, "links": plan_links}
+
+
+def resolve_blobs(plan):
+    """
+    Replace model zoo references in a plan with local blob paths, downloading
+    (or reusing blobconverter's cache) as needed
+    """
+    for node in plan["nodes"]:
+        blob = node["properties"].get("blob")
+        if isinstance(blob, dict):
+            node["properties"]["blob"] = str(blobconverter.from_zoo(name=blob["zoo"], shaves=blob.get("shaves", 6)))
+    return plan
+
+
+def build_pipeline(plan):
+    """
+    Construct a dai.Pipeline from a normalized plan. Returns the pipeline and
+    its nodes by name, so callers can extend the graph.
+    """
+    pipeline = dai.Pipeline()
+    nodes = {}
+    for node in plan["nodes"]:
+        node_type = NODE_TYPES[node["type"]]
+        created = pipeline.create(getattr(dai.node, node["type"]))
+        for key, value in node["properties"].items():
+            (_, lookup), setter = node_type["properties"][key]
+            setter(created, getattr(lookup(), value) if lookup is not None else value)
+        nodes[node["name"]] = created
+
+    for src, out, dst, inp in plan["links"]:
+        getattr(nodes[src], out).link(getattr(nodes[dst], inp))
+    return pipeline, nodes
+
+
+def compile_spec(spec, config=None):
+    """
+    Compile a pipeline spec into a dai.Pipeline. Returns the pipeline and its
+    nodes by name.
+    """
+    plan = resolve_blobs(validate_spec(resolve_spec(spec, config or {})))
+    return build_pipeline(plan)
+
+
+def compile_pipeline(name, config):
+    """
+    Compile the named spec from the 'pipelines' config section
+    """
+    pipelines = config.get("pipelines", ConfigManager.DEFAULT_CONFIG["pipelines"])
+    if name not in pipelines:
+        raise PipelineSpecError(f"No pipeline spec named '{name}'")
+    # Specs may reference sections a partial config leaves out
+    references = {**ConfigManager.DEFAULT_CONFIG, **config}
+    return compile_spec(pipelines[name], references)
@@ -0,0 +1,184 @@
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+import numpy as np
+
+
+class SyntheticImgFrame:
+    """
+    Stand-in for dai.ImgFrame carrying a host-generated image
+    """
+    def __init__(self, frame, sequence_num, timestamp):
+        self._frame = frame
+        self._sequence_num = sequence_num
+        self._timestamp = timestamp
+
+    def getCvFrame(self):
+        return self._frame
+
+    def getFrame(self):
+        return self._frame
+
+    def getSequenceNum(self):
+        return self._sequence_num
+
+    def getTimestamp(self):
+        return self._timestamp
+
+    def getTimestampDevice(self):
+        return self._timestamp
+
+
+class SyntheticDetections:
+    """
+    Stand-in for dai.SpatialImgDetections
+    """
+    def __init__(self, detections, sequence_num, timestamp):
+        self.detections = detections
+        self._sequence_num = sequence_num
+        self._timestamp = timestamp
+
+    def getSequenceNum(self):
+        return self._sequence_num
+
+    def getTimestamp(self):
+        return self._timestamp
+
+    def getTimestampDevice(self):
+        return self._timestamp
+
+
+class SyntheticFrameSource:
+    """
+    Generates moving RGB, raw depth and detection packets shaped like the
+    device streams, so host code can run without a camera attached
+    """
+    def __init__(self, rgb_size=(1280, 800), depth_size=(640, 400), n_labels=21, max_detections=3, seed=0):
+        self.rgb_size = tuple(rgb_size)
+        self.depth_size = tuple(depth_size)
+        self.n_labels = n_labels
+        self.max_detections = max_detections
+        self.sequence_num = 0
+        self._rng = np.random.default_rng(seed)
+
+        w, h = self.rgb_size
+        gradient = np.linspace(0, 255, w, dtype=np.float32)
+        self._rgb_base = np.repeat(gradient[None, :], h, axis=0).astype(np.uint8)
+
+        w, h = self.depth_size
+        ramp = np.linspace(400, 5000, h, dtype=np.float32)
+        self._depth_base = np.repeat(ramp[:, None], w, axis=1).astype(np.uint16)
+
+    def _timestamp(self):
+        # Host-synced like a device packet: on the host monotonic clock (dai.Clock)
+        return timedelta(seconds=time.monotonic())
+
+    def next_rgb(self):
+        shift = self.sequence_num * 4 % self.rgb_size[0]
+        channel = np.roll(self._rgb_base, shift, axis=1)
+        frame = np.dstack((channel, channel[::-1], 255 - channel))
+        return SyntheticImgFrame(frame, self.sequence_num, self._timestamp())
+
+    def next_depth(self):
+        shift = self.sequence_num * 2 % self.depth_size[1]
+        return SyntheticImgFrame(np.roll(self._depth_base, shift, axis=0), self.sequence_num, self._timestamp())
+
+    def next_detections(self):
+        detections = []
+        for _ in range(self._rng.integers(0, self.max_detections + 1)):
+            xmin, ymin = self._rng.uniform(0, 0.7, size=2)
+            width, height = self._rng.uniform(0.1, 0.3, size=2)
+            detections.append(SimpleNamespace(
+                label=int(self._rng.integers(1, self.n_labels)),
+                confidence=float(self._rng.uniform(0.5, 1.0)),
+                xmin=float(xmin), ymin=float(ymin),
+                xmax=float(xmin + width), ymax=float(ymin + height),
+                spatialCoordinates=SimpleNamespace(
+                    x=float(self._rng.uniform(-1000, 1000)),
+                    y=float(self._rng.uniform(-500, 500)),
+                    z=float(self._rng.uniform(500, 5000))
+                )
+            ))
+        return SyntheticDetections(detections, self.sequence_num, self._timestamp())
+
+    def advance(self):
+        self.sequence_num += 1
+
+
+class SyntheticQueue:
+    """
+    Stand-in for dai.DataOutputQueue fed by a SyntheticFrameSource
+    """
+    def __init__(self, source, name, fps=30):
+        self.source = source
+        self.name = name
+        self.period = 1.0 / fps if fps else 0.0
+        self._next_time = time.monotonic()
+
+    def _make(self):
+        # The rgb stream paces the source, like the camera does on a device,
+        # so depth and detections fetched after it share its sequence number
+        if self.name == "rgb":
+            self.source.advance()
+            packet = self.source.next_rgb()
+        elif self.name == "depth":
+            packet = self.source.next_depth()
+        elif self.name == "detections":
+            packet = self.source.next_detections()
+        else:
+            raise RuntimeError(f"Unknown stream '{self.name}'")
+        return packet
+
+    def get(self):
+        delay = self._next_time - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_time = max(self._next_time + self.period, time.monotonic() - self.period)
+        return self._make()
+
+    def tryGet(self):
+        if time.monotonic() < self._next_time:
+            return None
+        return self.get()
+
+    def has(self):
+        return time.monotonic() >= self._next_time
+
+
+class SyntheticDevice:
+    """
+    Stand-in for dai.Device that serves synthetic streams
+    """
+    def __init__(self, pipeline=None, source=None, fps=30):
+        self.pipeline = pipeline
+        self.source = source or SyntheticFrameSource()
+        self.fps = fps
+        self._queues = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        self._queues.clear()
+
+    def getOutputQueue(self, name, maxSize=4, blocking=False):
+        if name not in self._queues:
+            self._queues[name] = SyntheticQueue(self.source, name, self.fps)
+        return self._queues[name]
+
+    def getDeviceName(self):
+        return "synthetic"
+
+    def getConnectedCameras(self):
+        return []
+
+    def getUsbSpeed(self):
+        return "SYNTHETIC"
+
+    def getAvailableStereoPairs(self):
+        return []
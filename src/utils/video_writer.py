@@ -0,0 +1,170 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+import cv2
+import numpy as np
+from loguru import logger
+
+
+class VideoWriterBackend:
+    """
+    Interface shared by the video writer backends. Mirrors the subset of
+    cv2.VideoWriter the recorders use, so backends are interchangeable.
+    """
+    def __init__(self, path, fps, frame_size):
+        self.path = str(path)
+        self.fps = fps
+        self.frame_size = tuple(frame_size)
+
+    def isOpened(self):
+        raise NotImplementedError("Subclasses must implement isOpened()")
+
+    def write(self, frame):
+        raise NotImplementedError("Subclasses must implement write()")
+
+    def release(self):
+        raise NotImplementedError("Subclasses must implement release()")
+
+
+class OpenCVVideoWriter(VideoWriterBackend):
+    """
+    cv2.VideoWriter with a configurable fourcc (the original writer)
+    """
+    def __init__(self, path, fps, frame_size, fourcc="mp4v"):
+        super().__init__(path, fps, frame_size)
+        self.writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*fourcc), fps, self.frame_size)
+
+    def isOpened(self):
+        return self.writer.isOpened()
+
+    def write(self, frame):
+        self.writer.write(frame)
+
+    def release(self):
+        self.writer.release()
+
+
+class FFmpegVideoWriter(VideoWriterBackend):
+    """
+    Pipe raw BGR frames into an ffmpeg subprocess. Encoding runs in the
+    ffmpeg process with its own threads, so the producer only pays for the
+    pipe write. ffmpeg's stderr goes to a temporary file so a chatty encoder
+    can never block on a full pipe.
+    """
+    def __init__(self, path, fps, frame_size, binary="ffmpeg", codec="libx264", preset="veryfast",
+                 crf=23, pix_fmt="yuv420p", threads=0, extra_args=None):
+        super().__init__(path, fps, frame_size)
+        executable = shutil.which(binary)
+        if executable is None:
+            raise FileNotFoundError(f"ffmpeg binary not found: {binary}")
+
+        width, height = self.frame_size
+        self.command = [
+            executable, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-r", str(fps),
+            "-i", "-",
+            "-an", "-c:v", codec, "-preset", preset, "-crf", str(crf),
+            "-pix_fmt", pix_fmt, "-threads", str(threads),
+            *(extra_args or []),
+            self.path,
+        ]
+        self._frame_shape = (height, width, 3)
+        self.error = None
+        self._stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stderr=self._stderr)
+
+    def _stderr_text(self):
+        self._stderr.seek(0)
+        return self._stderr.read().decode(errors="replace").strip()
+
+    def _fail(self, message):
+        self.error = f"{message}: {self._stderr_text() or 'no output from ffmpeg'}"
+        logger.error(self.error)
+        return IOError(self.error)
+
+    def isOpened(self):
+        return self.error is None and self.process is not None and self.process.poll() is None
+
+    def write(self, frame):
+        if frame.shape != self._frame_shape:
+            raise ValueError(f"Frame shape {frame.shape} does not match writer size {self._frame_shape}")
+        if self.error is not None:
+            raise IOError(self.error)
+        if self.process.poll() is not None:
+            raise self._fail(f"ffmpeg exited with code {self.process.returncode} while writing {self.path}")
+        try:
+            self.process.stdin.write(np.ascontiguousarray(frame).data)
+        except BrokenPipeError:
+            self.process.wait()
+            raise self._fail(f"ffmpeg exited with code {self.process.returncode} while writing {self.path}")
+
+    def release(self):
+        if self.process is None:
+            return
+        process, self.process = self.process, None
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            # ffmpeg died before taking the last frames; the exit code below reports it
+            pass
+        returncode = process.wait()
+        if returncode != 0 and self.error is None:
+            self._fail(f"ffmpeg failed with code {returncode} for {self.path}")
+        self._stderr.close()
+
+
+BACKENDS = ("opencv", "ffmpeg")
+
+
+def create_video_writer(path, fps, frame_size, writer_config=None):
+    """
+    Create the video writer selected by the 'writer' config section
+    """
+    writer_config = writer_config or {"backend": "opencv", "fourcc": "mp4v"}
+    backend = writer_config["backend"]
+    if backend == "opencv":
+        return OpenCVVideoWriter(path, fps, frame_size, fourcc=writer_config.get("fourcc", "mp4v"))
+    if backend == "ffmpeg":
+        return FFmpegVideoWriter(path, fps, frame_size, **writer_config.get("ffmpeg", {}))
+    raise ValueError(f"Unknown video writer backend '{backend}', expected one of {', '.join(BACKENDS)}")
+
+
+def benchmark_writers(writer_configs, frames, fps=30):
+    """
+    Encode the same frames with each writer config and report encode fps and
+    output size. writer_configs maps a display name to a 'writer' config section.
+    """
+    frame_size = (frames[0].shape[1], frames[0].shape[0])
+    results = []
+    with tempfile.TemporaryDirectory(prefix="oakd-writer-bench-") as tmp_dir:
+        for name, writer_config in writer_configs.items():
+            path = os.path.join(tmp_dir, f"{name}.mp4")
+            try:
+                writer = create_video_writer(path, fps, frame_size, writer_config)
+            except (FileNotFoundError, ValueError) as e:
+                logger.warning(f"Skipping writer '{name}': {e}")
+                continue
+            if not writer.isOpened():
+                logger.warning(f"Skipping writer '{name}': failed to open")
+                continue
+
+            started = time.perf_counter()
+            for frame in frames:
+                writer.write(frame)
+            writer.release()
+            elapsed = time.perf_counter() - started
+
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            results.append({
+                "name": name,
+                "frames": len(frames),
+                "seconds": elapsed,
+                "fps": len(frames) / elapsed if elapsed > 0 else 0.0,
+                "bytes": size,
+                "bytes_per_frame": size / len(frames),
+            })
+            logger.info(f"Writer '{name}': {results[-1]['fps']:.1f} fps, {size / 2**20:.2f} MiB")
+    return results
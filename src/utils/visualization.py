@@ -2,44 +2,16 @@ import depthai as dai
 import cv2
 import numpy as np
 from loguru import logger
+from src.utils.config import ConfigManager
+from src.utils.pipeline_spec import compile_pipeline
 
-def show_video_stream():
+def show_video_stream(config=None):
     """
     Streams and displays RGB and Depth video from the OAK-D camera.
     """
     logger.info("Starting video stream...")
     
-    # Create pipeline
-    pipeline = dai.Pipeline()
-
-    # Define a color camera node
-    cam_rgb = pipeline.createColorCamera()
-    cam_rgb.setPreviewSize(640, 480)
-    cam_rgb.setInterleaved(False)
-    cam_rgb.setFps(30)
-
-    # Create a depth camera node
-    mono_left = pipeline.createMonoCamera()
-    mono_left.setBoardSocket(dai.CameraBoardSocket.LEFT)
-    mono_left.setResolution(dai.MonoCameraProperties.SensorResolution.THE_400_P)
-
-    mono_right = pipeline.createMonoCamera()
-    mono_right.setBoardSocket(dai.CameraBoardSocket.RIGHT)
-    mono_right.setResolution(dai.MonoCameraProperties.SensorResolution.THE_400_P)
-
-    stereo = pipeline.createStereoDepth()
-    stereo.setDefaultProfilePreset(dai.node.StereoDepth.PresetMode.HIGH_DENSITY)
-    mono_left.out.link(stereo.left)
-    mono_right.out.link(stereo.right)
-
-    # Create XLinkOut nodes to stream video to the host
-    xout_rgb = pipeline.createXLinkOut()
-    xout_rgb.setStreamName("rgb")
-    cam_rgb.preview.link(xout_rgb.input)
-
-    xout_depth = pipeline.createXLinkOut()
-    xout_depth.setStreamName("depth")
-    stereo.depth.link(xout_depth.input)
+    pipeline, _ = compile_pipeline("preview", config or ConfigManager.DEFAULT_CONFIG)
 
     try:
         # Connect to the device and start the pipeline
@@ -15,3 +15,16 @@ def test_check_connection_command():
         result = runner.invoke(app, ['check-connection'])
         assert result.exit_code == 0
         assert 'Connected to device!' in result.stdout
+
+def test_detect_reads_config_and_confidence_override(tmp_path):
+    config_file = tmp_path / 'config.yml'
+    config_file.write_text("detection: {confidence_threshold: 0.7}\n")
+    with patch('src.cli.OakDObjectDetectionApp') as mock_app:
+        mock_app.return_value.roi_archive = None
+        result = runner.invoke(app, ['detect', '--config', str(config_file), '-o', str(tmp_path)])
+        assert result.exit_code == 0
+        assert mock_app.call_args.kwargs['config']['detection']['confidence_threshold'] == 0.7
+
+        result = runner.invoke(app, ['detect', '--config', str(config_file), '-o', str(tmp_path), '-c', '0.3'])
+        assert result.exit_code == 0
+        assert mock_app.call_args.kwargs['config']['detection']['confidence_threshold'] == 0.3
@@ -0,0 +1,51 @@
+import json
+import pytest
+from types import SimpleNamespace
+from src.core.analytics import DetectionAnalytics, WindowedCounter
+
+LABELS = ['background', 'car', 'person']
+
+def detection(label, z):
+    return SimpleNamespace(label=label, spatialCoordinates=SimpleNamespace(x=0, y=0, z=z))
+
+def test_window_expires_old_buckets():
+    counter = WindowedCounter(10, len(LABELS), buckets=10)
+    counter.add_frame(0.5, [2, 2], [1.5])
+    counter.add_frame(5.5, [1], [3.0])
+    snapshot = counter.snapshot(9.9, LABELS)
+    assert snapshot['counts'] == {'car': 1, 'person': 2}
+    assert snapshot['nearest_m'] == 1.5
+
+    snapshot = counter.snapshot(11.0, LABELS)
+    assert snapshot['counts'] == {'car': 1}
+    assert snapshot['nearest_m'] == 3.0
+
+    snapshot = counter.snapshot(1000.0, LABELS)
+    assert snapshot['frames'] == 0
+    assert snapshot['nearest_m'] is None
+
+def test_occupancy():
+    counter = WindowedCounter(10, len(LABELS), buckets=10)
+    counter.add_frame(1.0, [2], [])
+    counter.add_frame(1.1, [], [])
+    snapshot = counter.snapshot(1.2, LABELS)
+    assert snapshot['occupancy'] == 0.5
+    assert snapshot['mean_objects'] == 0.5
+
+def test_analytics_windows_and_metrics(tmp_path):
+    now = [0.0]
+    analytics = DetectionAnalytics(LABELS, windows=(10, 60, 3600), clock=lambda: now[0])
+    analytics.update([detection(2, 2500), detection(1, 0)])
+    now[0] = 30.0
+    analytics.update([detection(2, 4000)])
+
+    snapshot = analytics.snapshot()
+    assert list(snapshot) == ['10s', '1m', '1h']
+    assert snapshot['10s']['counts'] == {'person': 1}
+    assert snapshot['1m']['counts'] == {'car': 1, 'person': 2}
+    assert snapshot['1m']['nearest_m'] == 2.5
+
+    path = tmp_path / 'metrics.json'
+    analytics.write_metrics(str(path), snapshot)
+    assert json.loads(path.read_text())['windows']['1h']['frames'] == 2
+    assert len(analytics.summary_lines(snapshot)) == 3
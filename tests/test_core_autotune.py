@@ -0,0 +1,73 @@
+import copy
+import cv2
+import numpy as np
+from src.core.autotune import AutoTuner, expand_grid, load_replay_frames, pareto_front, set_path
+from src.utils.config import ConfigManager
+
+def test_expand_grid():
+    trials = expand_grid({'camera.fps': [15, 30], 'camera.queue_size': [2, 4, 8]})
+    assert len(trials) == 6
+    assert {'camera.fps': 30, 'camera.queue_size': 8} in trials
+
+def test_pareto_front():
+    results = [
+        {'name': 'a', 'fps': 30, 'latency_p95_ms': 10, 'cpu_percent': 50},
+        {'name': 'b', 'fps': 30, 'latency_p95_ms': 20, 'cpu_percent': 60},
+        {'name': 'c', 'fps': 15, 'latency_p95_ms': 5, 'cpu_percent': 30},
+    ]
+    assert [r['name'] for r in pareto_front(results)] == ['a', 'c']
+
+def test_best_prefers_trials_that_keep_up():
+    tuner = AutoTuner(copy.deepcopy(ConfigManager.DEFAULT_CONFIG))
+    results = [
+        # Most frames per second, but it cannot keep up with 60 fps
+        {'name': 'a', 'fps': 45, 'drop_rate': 0.25, 'latency_p95_ms': 5, 'cpu_percent': 40},
+        {'name': 'b', 'fps': 30, 'drop_rate': 0.0, 'latency_p95_ms': 10, 'cpu_percent': 50},
+        {'name': 'c', 'fps': 15, 'drop_rate': 0.0, 'latency_p95_ms': 8, 'cpu_percent': 30},
+        # Same throughput as 'b' within noise and a stray drop, but cheaper
+        {'name': 'd', 'fps': 29.8, 'drop_rate': 0.005, 'latency_p95_ms': 9, 'cpu_percent': 45},
+    ]
+    # Highest throughput among trials that keep up; drops break the tie first
+    assert tuner.select_best(results)['name'] == 'b'
+    assert tuner.select_best([r for r in results if r['name'] != 'b'])['name'] == 'd'
+    # With nothing keeping up, the highest throughput still wins
+    assert tuner.select_best(results[:1])['name'] == 'a'
+
+def test_autotune_writes_loadable_overlay(tmp_path):
+    config = copy.deepcopy(ConfigManager.DEFAULT_CONFIG)
+    config['autotune']['replay_frames'] = 5
+    grid = {'camera.fps': [60], 'camera.rgb_resolution': [[64, 48], [32, 24]], 'camera.queue_size': [2]}
+    result = AutoTuner(config, grid=grid, duration=0.3).run()
+    assert len(result['results']) == 2
+    assert result['best'] in result['pareto_front']
+    assert all(r['frames'] > 0 for r in result['results'])
+
+    overlay = tmp_path / 'autotune.yml'
+    AutoTuner.write_overlay(result['best'], str(overlay))
+    loaded = ConfigManager.load_config(None, overlay_paths=[str(overlay)])
+    assert loaded['camera']['rgb_resolution'] == result['best']['params']['camera.rgb_resolution']
+    assert loaded['camera']['queue_size'] == 2
+    assert loaded['output'] == ConfigManager.DEFAULT_CONFIG['output']
+
+def test_replay_recovers_depth_from_colorized_session(tmp_path):
+    config = copy.deepcopy(ConfigManager.DEFAULT_CONFIG)
+    writers = {
+        name: cv2.VideoWriter(str(tmp_path / config['output'][name]), cv2.VideoWriter_fourcc(*'mp4v'), 30, (64, 48))
+        for name in ('rgb_filename', 'depth_filename')
+    }
+    depth = np.full((48, 64), 200, dtype=np.uint8)
+    for _ in range(3):
+        writers['rgb_filename'].write(np.zeros((48, 64, 3), dtype=np.uint8))
+        writers['depth_filename'].write(cv2.applyColorMap(depth, cv2.COLORMAP_JET))
+    for writer in writers.values():
+        writer.release()
+
+    frames = load_replay_frames(tmp_path, count=2, rgb_size=(64, 48), depth_size=(64, 48), config=config)
+    assert len(frames) == 2
+    # The colormap is inverted, not converted to luminance
+    assert abs(int(np.median(frames[0][1])) - 200) <= 12
+
+def test_set_path_creates_sections():
+    config = {}
+    set_path(config, 'detection.preview_size', [304, 304])
+    assert config == {'detection': {'preview_size': [304, 304]}}
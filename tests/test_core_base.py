@@ -2,6 +2,7 @@ import pytest
 from unittest.mock import MagicMock, patch
 from src.core.base import OakDBase
 import numpy as np
+import time
 
 @pytest.fixture
 def mock_config(tmp_path):
@@ -49,3 +50,31 @@ def test_process_depth_frame(mock_config):
         mock_cv2.equalizeHist.assert_called_once()
         mock_cv2.applyColorMap.assert_called_once()
         mock_cv2.resize.assert_called_once()
+
+def test_capture_time_uses_clock_model(mock_config):
+    from datetime import timedelta
+    from types import SimpleNamespace
+    assert OakDBase(mock_config).capture_time(None) is None
+
+    mock_config['clock'] = {'enabled': True, 'window': 64, 'latency_floor_ms': 0.0}
+    base = OakDBase(mock_config)
+    packet = SimpleNamespace(getTimestampDevice=lambda: timedelta(seconds=5))
+    capture_time = base.capture_time(packet)
+    assert capture_time == pytest.approx(time.time(), abs=1.0)
+    assert base.clock.stats()['latency_ms']['p50'] is None
+
+def test_capture_time_latency_from_host_synced_timestamp(mock_config):
+    from datetime import timedelta
+    from types import SimpleNamespace
+    mock_config['clock'] = {'enabled': True, 'window': 64, 'latency_floor_ms': 0.0}
+    base = OakDBase(mock_config)
+    packet = SimpleNamespace(
+        getTimestampDevice=lambda: timedelta(seconds=5),
+        getTimestamp=lambda: timedelta(seconds=99.95),
+    )
+    with patch('src.core.base.dai.Clock.now', return_value=timedelta(seconds=100.0)):
+        capture_time = base.capture_time(packet)
+    # Stamped from the host-synced timestamp, not the clock model's estimate
+    assert capture_time == pytest.approx(base.clock.host_to_wall(99.95))
+    assert base.clock.stats()['latency_ms']['p50'] == pytest.approx(50.0)
+    assert base.clock_summary().startswith("Capture latency p50 50.0 ms")
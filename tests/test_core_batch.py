@@ -0,0 +1,93 @@
+import copy
+import pytest
+import cv2
+import numpy as np
+from src.core.batch import BatchProcessor, SessionProcessor, find_sessions, plan_tasks
+from src.utils.config import ConfigManager
+
+@pytest.fixture
+def mock_config(tmp_path):
+    config = copy.deepcopy(ConfigManager.DEFAULT_CONFIG)
+    config['camera']['rgb_resolution'] = [64, 48]
+    config['output']['base_path'] = str(tmp_path)
+    config['process']['chunk_frames'] = 4
+    return config
+
+def write_video(path, frames, colorize=False):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), 30, (64, 48))
+    for i in range(frames):
+        frame = np.full((48, 64), i * 20 % 256, dtype=np.uint8)
+        frame = cv2.applyColorMap(frame, cv2.COLORMAP_JET) if colorize else cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        writer.write(frame)
+    writer.release()
+
+def make_session(root, config, frames=10):
+    root.mkdir(parents=True)
+    write_video(root / config['output']['rgb_filename'], frames)
+    write_video(root / config['output']['depth_filename'], frames, colorize=True)
+
+def test_find_sessions(mock_config, tmp_path):
+    make_session(tmp_path / 'a', mock_config)
+    make_session(tmp_path / 'b' / 'data', mock_config)
+    assert find_sessions(tmp_path, mock_config) == [tmp_path / 'a', tmp_path / 'b' / 'data']
+
+def test_plan_tasks_chunks_sessions(mock_config, tmp_path):
+    make_session(tmp_path / 'a', mock_config)
+    tasks, outputs = plan_tasks([tmp_path / 'a'], 'composite', mock_config)
+    assert [(t['start'], t['end']) for t in tasks] == [(0, 4), (4, 8), (8, 10)]
+    assert len(outputs) == 1
+
+def test_decolorize_inverts_colormap(mock_config):
+    processor = SessionProcessor(mock_config)
+    gray = np.arange(256, dtype=np.uint8).reshape(16, 16)
+    recovered = processor.decolorize(cv2.applyColorMap(gray, cv2.COLORMAP_JET))
+    assert np.abs(recovered.astype(int) - gray.astype(int)).max() <= 8
+
+def test_run_and_resume(mock_config, tmp_path):
+    make_session(tmp_path / 'a', mock_config)
+    stats = BatchProcessor(tmp_path, mock_config, 'composite', workers=1).run()
+    [output] = (tmp_path / 'a' / 'processed').glob('composite-jet-*.mp4')
+    assert stats['frames'] == 10
+    assert stats['outputs'] == [str(output)]
+    assert not list(output.parent.glob('*.part*'))
+
+    capture = cv2.VideoCapture(str(output))
+    assert int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)) == 128
+    capture.release()
+
+    stats = BatchProcessor(tmp_path, mock_config, 'composite', workers=1).run()
+    assert stats['chunks'] == 0
+
+def test_changed_settings_and_restart_rerender(mock_config, tmp_path):
+    make_session(tmp_path / 'a', mock_config)
+    BatchProcessor(tmp_path, mock_config, 'colorize', workers=1).run()
+
+    mock_config['depth']['colormap'] = 'COLORMAP_TURBO'
+    stats = BatchProcessor(tmp_path, mock_config, 'colorize', workers=1).run()
+    assert stats['frames'] == 10
+    assert len(list((tmp_path / 'a' / 'processed').glob('colorize-*.mp4'))) == 2
+
+    assert BatchProcessor(tmp_path, mock_config, 'colorize', workers=1).run()['frames'] == 0
+    assert BatchProcessor(tmp_path, mock_config, 'colorize', workers=1, restart=True).run()['frames'] == 10
+
+def test_unknown_operation(mock_config, tmp_path):
+    with pytest.raises(ValueError):
+        BatchProcessor(tmp_path, mock_config, 'sharpen')
+
+def test_merge_copies_streams_with_ffmpeg(tmp_path):
+    import os
+    import stat
+    from src.core.batch import _merge_parts
+    # Stand-in ffmpeg that records the concat list it was given
+    binary = tmp_path / 'fake-ffmpeg'
+    binary.write_text('#!/bin/sh\nwhile [ "$1" != "-i" ]; do shift; done\ncp "$2" "$(eval echo \\${$#})"\n')
+    binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+    parts = [tmp_path / 'out.part00000000.mp4', tmp_path / "it's.part00000004.mp4"]
+    for part in parts:
+        part.write_bytes(b'x')
+
+    output = tmp_path / 'out.mp4'
+    _merge_parts(output, parts, 30, {'backend': 'ffmpeg', 'ffmpeg': {'binary': str(binary)}})
+    lines = output.read_text().splitlines()
+    assert lines == [f"file '{parts[0]}'", f"file '{tmp_path}/it'\\''s.part00000004.mp4'"]
+    assert not any(p.exists() for p in parts)
@@ -0,0 +1,70 @@
+import copy
+import threading
+import time
+import pytest
+from src.core.daemon import DaemonClient, DaemonError, DeviceDaemon
+from src.utils.config import ConfigManager
+from src.utils.synthetic import SyntheticDevice, SyntheticFrameSource
+
+@pytest.fixture
+def daemon(tmp_path):
+    config = copy.deepcopy(ConfigManager.DEFAULT_CONFIG)
+    config['camera']['rgb_resolution'] = [64, 48]
+    config['output']['base_path'] = str(tmp_path / 'recordings')
+    socket_path = tmp_path / 'd.sock'
+    source = SyntheticFrameSource(rgb_size=(64, 48), depth_size=(32, 20))
+    daemon = DeviceDaemon(config, socket_path, device_factory=lambda p: SyntheticDevice(p, source=source, fps=100))
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+
+    client = DaemonClient(socket_path)
+    deadline = time.time() + 10
+    while not client.is_available():
+        assert time.time() < deadline, 'daemon did not start'
+        time.sleep(0.05)
+    yield client
+
+    client.request('shutdown')
+    thread.join(10)
+    assert not socket_path.exists()
+
+def test_status(daemon):
+    status = daemon.request('status')
+    assert status['pipeline_running']
+    assert status['device']['device_name'] == 'synthetic'
+    assert status['recording'] is None
+
+def test_recording(daemon, tmp_path):
+    recording = daemon.request('start_recording', output_dir='out', duration=0.3)
+    assert recording['duration'] == 0.3
+    with pytest.raises(DaemonError):
+        daemon.request('start_recording', output_dir='out')
+
+    deadline = time.time() + 10
+    while daemon.request('recording', session_id=recording['session_id'])['state'] == 'recording':
+        assert time.time() < deadline, 'recording did not finish'
+        time.sleep(0.05)
+    assert daemon.request('status')['recording'] is None
+    assert daemon.request('recording', session_id=recording['session_id'])['frames'] > 0
+    assert (tmp_path / 'recordings' / 'out' / 'data' / 'rgb_video.mp4').stat().st_size > 0
+    assert daemon.request('status')['frames_received'] > 0
+
+def test_recording_defaults_to_a_session_directory(daemon, tmp_path):
+    recording = daemon.request('start_recording', duration=0.1)
+    assert recording['output_path'].startswith(str((tmp_path / 'recordings' / recording['session_id']).resolve()))
+    daemon.request('stop_recording')
+
+def test_recording_outside_output_root_is_refused(daemon, tmp_path):
+    for output_dir in [str(tmp_path / 'elsewhere'), '../elsewhere', '/etc']:
+        with pytest.raises(DaemonError, match='must be under'):
+            daemon.request('start_recording', output_dir=output_dir)
+    assert daemon.request('status')['recording'] is None
+    with pytest.raises(DaemonError, match='Unknown recording session'):
+        daemon.request('recording', session_id='nope')
+
+def test_unknown_command(daemon):
+    with pytest.raises(DaemonError, match='Unknown command'):
+        daemon.request('reboot')
+
+def test_client_without_daemon(tmp_path):
+    assert not DaemonClient(tmp_path / 'missing.sock').is_available()
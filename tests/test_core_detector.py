@@ -7,3 +7,121 @@ def test_init():
         app = OakDObjectDetectionApp()
         assert app.pipeline is not None
         mock_pipeline.assert_called()
+
+def test_process_packets_without_pipeline(tmp_path):
+    from src.utils.synthetic import SyntheticDevice, SyntheticFrameSource
+    app = OakDObjectDetectionApp(output_path=str(tmp_path / 'out.mp4'), build_pipeline=False)
+    assert app.pipeline is None
+
+    device = SyntheticDevice(source=SyntheticFrameSource(rgb_size=(304, 304)), fps=0)
+    frame = app.process_packets(device.getOutputQueue('rgb').get(), device.getOutputQueue('detections').get())
+    assert frame.shape == (304, 304, 3)
+    assert app.frame_count == 1
+    assert app.process_packets(None, None) is None
+
+def test_motion_gate_skips_detection_only_updates_on_static_scenes(tmp_path):
+    import copy
+    from datetime import timedelta
+    import numpy as np
+    from src.utils.config import ConfigManager
+    from src.utils.synthetic import SyntheticDetections, SyntheticImgFrame
+    config = copy.deepcopy(ConfigManager.DEFAULT_CONFIG)
+    config['output']['base_path'] = str(tmp_path)
+    config['motion'].update({'enabled': True, 'hold_frames': 1, 'keepalive_seconds': 100.0})
+    app = OakDObjectDetectionApp(preview_size=(304, 304), config=config, build_pipeline=False)
+
+    for i in range(5):
+        rgb = SyntheticImgFrame(np.full((304, 304, 3), 100, dtype=np.uint8), i, timedelta(seconds=i))
+        app.process_packets(rgb, None)
+    with patch.object(app, 'visualize_detections') as visualize:
+        assert app.process_packets(None, SyntheticDetections([], 5, timedelta(seconds=5))) is None
+        visualize.assert_not_called()
+    report = app.log_motion_savings()
+    assert report['frames_seen'] == 6
+    assert report['frames_skipped'] == 5
+
+def test_roi_capture_archives_full_resolution_crops(tmp_path):
+    import copy
+    from datetime import timedelta
+    from types import SimpleNamespace
+    import numpy as np
+    from src.utils.config import ConfigManager
+    from src.utils.crop_archive import CropArchive
+    from src.utils.synthetic import SyntheticDetections, SyntheticImgFrame
+    config = copy.deepcopy(ConfigManager.DEFAULT_CONFIG)
+    config['output']['base_path'] = str(tmp_path)
+    config['roi_capture']['enabled'] = True
+    app = OakDObjectDetectionApp(preview_size=(304, 304), config=config, build_pipeline=False)
+
+    person = SimpleNamespace(
+        label=15, confidence=0.9, xmin=0.25, ymin=0.25, xmax=0.5, ymax=0.75,
+        spatialCoordinates=SimpleNamespace(x=0, y=0, z=2000)
+    )
+    faint = SimpleNamespace(**{**vars(person), 'confidence': 0.2})
+    hires = SyntheticImgFrame(np.zeros((1080, 1920, 3), dtype=np.uint8), 5, timedelta(seconds=1))
+
+    # The full-resolution frame waits until its detections arrive
+    assert app.process_hires(hires) == 0
+    app.process_packets(None, SyntheticDetections([person, faint], 5, timedelta(seconds=1)))
+    assert app.process_hires() == 1
+    app.cleanup(display=False)
+
+    [record] = CropArchive.read_index(tmp_path / 'data' / 'crops')
+    assert record['sequence'] == 5 and record['label_name'] == 'person'
+    # Box 0.25..0.5 of the central 1080x1080 region, plus the margin
+    x1, y1, x2, y2 = record['box']
+    assert x1 < 420 + 270 < 420 + 540 < x2 and y1 < 270 and y2 > 810
+
+def test_roi_script_sends_frame_closest_to_detections():
+    from datetime import timedelta
+    from types import SimpleNamespace
+    import numpy as np
+    from src.core.detector import ROI_SCRIPT
+    from src.utils.synthetic import SyntheticDetections, SyntheticImgFrame
+    person = SimpleNamespace(confidence=0.9)
+    frames = [SyntheticImgFrame(np.zeros((2, 2, 3), dtype=np.uint8), seq, timedelta(0)) for seq in (6, 7)]
+    detections = iter([SyntheticDetections([person], 5, timedelta(0))])
+
+    class Done(Exception):
+        pass
+
+    def next_detections():
+        try:
+            return next(detections)
+        except StopIteration:
+            raise Done
+    sent = []
+    io = {
+        'detections': SimpleNamespace(get=next_detections),
+        'frames': SimpleNamespace(tryGetAll=lambda: frames),
+        'hires': SimpleNamespace(send=sent.append),
+    }
+    with pytest.raises(Done):
+        exec(ROI_SCRIPT.format(interval=10, min_confidence=0.5), {'node': SimpleNamespace(io=io)})
+    # Not the newest frame: the one closest to the detections' frame
+    assert [f.getSequenceNum() for f in sent] == [6]
+
+def test_frame_bus_publishes_preview_and_depth(tmp_path):
+    import copy
+    import uuid
+    from datetime import timedelta
+    import numpy as np
+    from src.utils.config import ConfigManager
+    from src.utils.frame_bus import FrameBusReader
+    from src.utils.synthetic import SyntheticImgFrame
+    prefix = f"oakd-test-{uuid.uuid4().hex[:8]}"
+    config = copy.deepcopy(ConfigManager.DEFAULT_CONFIG)
+    config['output']['base_path'] = str(tmp_path)
+    config['frame_bus'] = {'enabled': True, 'prefix': prefix, 'slots': 4}
+    app = OakDObjectDetectionApp(preview_size=(32, 32), config=config, build_pipeline=False)
+    app.process_packets(SyntheticImgFrame(np.zeros((32, 32, 3), dtype=np.uint8), 4, timedelta(seconds=1)), None)
+    app.process_depth(SyntheticImgFrame(np.full((32, 32), 1500, dtype=np.uint16), 4, timedelta(seconds=1)))
+
+    readers = [FrameBusReader(f"{prefix}-{stream}") for stream in ('preview', 'depth')]
+    preview, depth = (reader.latest() for reader in readers)
+    assert preview.sequence == depth.sequence == 4
+    assert depth.array.dtype == np.uint16 and int(depth.array[0, 0]) == 1500
+    del preview, depth
+    for reader in readers:
+        reader.close()
+    app.cleanup(display=False)
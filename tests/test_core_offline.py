@@ -0,0 +1,93 @@
+import copy
+import json
+import pytest
+import cv2
+import numpy as np
+from src.core.offline import OfflineDetectionApp
+from src.utils.config import ConfigManager
+
+class FakeNet:
+    """Returns one 'person' per frame, plus a low-confidence box and padding"""
+    def setInput(self, blob):
+        self.batch = blob.shape[0]
+
+    def forward(self):
+        rows = [[i, 15, 0.9, 0.1, 0.2, 0.3, 0.4] for i in range(self.batch)]
+        rows.append([0, 7, 0.1, 0.0, 0.0, 1.0, 1.0])
+        rows.append([-1, 0, 0, 0, 0, 0, 0])
+        return np.array(rows, dtype=np.float32).reshape(1, 1, -1, 7)
+
+@pytest.fixture
+def mock_config(tmp_path):
+    config = copy.deepcopy(ConfigManager.DEFAULT_CONFIG)
+    config['output']['base_path'] = str(tmp_path)
+    config['offline_detection']['batch_size'] = 4
+    config['offline_detection']['workers'] = 3
+    return config
+
+def write_video(path, frames):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), 30, (64, 48))
+    for i in range(frames):
+        writer.write(np.full((48, 64, 3), i, dtype=np.uint8))
+    writer.release()
+
+def test_parse_output(mock_config):
+    app = OfflineDetectionApp(mock_config, net_factory=FakeNet)
+    net = FakeNet()
+    net.setInput(np.zeros((2, 3, 300, 300)))
+    results = app.parse_output(net.forward(), 2)
+    assert [len(r) for r in results] == [1, 1]
+    assert app.detection_to_dict(results[1][0])['label_name'] == 'person'
+
+def test_detect_video_writes_frames_in_order(mock_config, tmp_path):
+    video = tmp_path / 'rgb_video.mp4'
+    write_video(video, 11)
+    app = OfflineDetectionApp(mock_config, net_factory=FakeNet)
+    stats = app.run_offline(video)
+    assert stats['frames'] == 11
+
+    lines = [json.loads(line) for line in (tmp_path / 'rgb_video.detections.jsonl').read_text().splitlines()]
+    assert [line['frame'] for line in lines] == list(range(11))
+    assert all(line['detections'][0]['label'] == 15 for line in lines)
+
+def test_missing_model(mock_config):
+    with pytest.raises(FileNotFoundError):
+        OfflineDetectionApp.load_net(mock_config['offline_detection'])
+
+def test_failed_inference_stops_every_thread(mock_config, tmp_path):
+    import threading
+
+    class FailingNet(FakeNet):
+        def forward(self):
+            raise RuntimeError('inference failed')
+
+    video = tmp_path / 'rgb_video.mp4'
+    write_video(video, 40)
+    before = set(threading.enumerate())
+    app = OfflineDetectionApp(mock_config, net_factory=FailingNet)
+    with pytest.raises(RuntimeError, match='inference failed'):
+        app.detect_video(video)
+    assert not [t for t in threading.enumerate() if t not in before and t.is_alive()]
+    assert not (tmp_path / 'rgb_video.detections.jsonl').exists()
+
+def test_unreadable_video_is_an_error(mock_config, tmp_path):
+    broken = tmp_path / 'broken' / mock_config['output']['rgb_filename']
+    broken.parent.mkdir()
+    broken.write_bytes(b'not a video')
+    app = OfflineDetectionApp(mock_config, net_factory=FakeNet)
+    with pytest.raises(IOError):
+        app.run_offline(broken)
+    assert not broken.with_name('rgb_video.detections.jsonl').exists()
+
+    # In a directory of sessions it is skipped and reported
+    write_video(tmp_path / mock_config['output']['rgb_filename'], 5)
+    threads = cv2.getNumThreads()
+    cv2.setNumThreads(4)
+    try:
+        stats = app.run_offline(tmp_path)
+        # OpenCV's own threading is restored after a multi-worker run
+        assert cv2.getNumThreads() == 4
+    finally:
+        cv2.setNumThreads(threads)
+    assert stats['frames'] == 5
+    assert stats['failed'] == [str(broken)]
@@ -15,3 +15,43 @@ def test_init(mock_config):
         recorder = OakDCamera(mock_config)
         assert recorder.pipeline is not None
         mock_pipeline.assert_called()
+
+def test_motion_gate_skips_static_frames(mock_config):
+    from src.utils.synthetic import SyntheticImgFrame
+    import numpy as np
+    mock_config['camera']['rgb_resolution'] = [64, 48]
+    mock_config['motion'] = {
+        'enabled': True, 'source': 'rgb', 'size': [16, 12], 'on_threshold': 0.02, 'off_threshold': 0.01,
+        'hold_frames': 2, 'keepalive_seconds': 100.0, 'reference_alpha': 0.1
+    }
+    recorder = OakDCamera(mock_config)
+    for _ in range(10):
+        rgb = SyntheticImgFrame(np.zeros((48, 64, 3), dtype=np.uint8), 0, None)
+        depth = SyntheticImgFrame(np.full((20, 32), 1000, dtype=np.uint16), 0, None)
+        recorder.process_frames(rgb, depth)
+    # The first frame and the hold period are recorded, then the scene is static
+    assert recorder.frame_count == 2
+    recorder.cleanup()
+    assert recorder.log_motion_savings()['frames_skipped'] == 8
+
+def test_frame_bus_publishes_raw_frames(mock_config):
+    from datetime import timedelta
+    from src.utils.frame_bus import FrameBusReader
+    from src.utils.synthetic import SyntheticImgFrame
+    import numpy as np
+    import uuid
+    prefix = f"oakd-test-{uuid.uuid4().hex[:8]}"
+    mock_config['camera']['rgb_resolution'] = [64, 48]
+    mock_config['frame_bus'] = {'enabled': True, 'prefix': prefix, 'slots': 4}
+    recorder = OakDCamera(mock_config)
+    rgb = SyntheticImgFrame(np.full((48, 64, 3), 50, dtype=np.uint8), 3, timedelta(seconds=2))
+    depth = SyntheticImgFrame(np.full((20, 32), 1000, dtype=np.uint16), 3, timedelta(seconds=2))
+    recorder.process_frames(rgb, depth)
+
+    reader = FrameBusReader(f"{prefix}-depth")
+    frame = reader.latest()
+    assert frame.sequence == 3 and frame.device_timestamp == 2.0
+    assert frame.array.dtype == np.uint16 and frame.array.shape == (20, 32)
+    del frame
+    reader.close()
+    recorder.cleanup()
@@ -0,0 +1,36 @@
+import copy
+import pytest
+from src.core.soak import SoakRunner, analyze_samples
+from src.utils.config import ConfigManager
+
+def make_samples(rss_mb, fps):
+    return [
+        {'elapsed': i * 60.0, 'rss_bytes': r * 2**20, 'open_fds': 10, 'fps': f,
+         'latency_ms': {'p50': 1.0, 'p95': 2.0, 'p99': 3.0, 'max': 4.0}}
+        for i, (r, f) in enumerate(zip(rss_mb, fps))
+    ]
+
+def test_analyze_flags_memory_growth_and_decay():
+    summary = analyze_samples(make_samples([100, 120, 140, 160, 180, 200, 220], [30, 30, 30, 25, 20, 20, 20]))
+    assert summary['flags'] == ['memory_growth', 'throughput_decay']
+
+def test_analyze_stable_run():
+    summary = analyze_samples(make_samples([100, 101, 100, 101, 100, 101], [30] * 6))
+    assert summary['flags'] == []
+
+def test_analyze_needs_enough_samples():
+    assert analyze_samples(make_samples([100], [30]))['flags'] == []
+
+@pytest.mark.parametrize('target', ['record', 'detect'])
+def test_soak_runs_without_device(target, tmp_path):
+    config = copy.deepcopy(ConfigManager.DEFAULT_CONFIG)
+    config['camera']['rgb_resolution'] = [64, 48]
+    # Keys the analysis does not know about must not break the final report
+    config['soak']['report_path'] = str(tmp_path / 'unused.json')
+    report = SoakRunner(target, config, duration=0.5, sample_interval=0.1).run()
+    assert report['frames'] > 0
+    assert report['samples'][-1]['rss_bytes'] > 0
+
+    path = tmp_path / 'report.json'
+    SoakRunner.write_report(report, str(path))
+    assert path.exists()
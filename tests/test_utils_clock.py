@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from src.utils.clock import ClockSync
+
+def simulate(clock, seconds=60.0, fps=30, offset=1234.5, drift_ppm=80.0, seed=0):
+    """Feed frames captured on a skewed device clock and received with jittered latency"""
+    rng = np.random.default_rng(seed)
+    errors = []
+    for i in range(int(seconds * fps)):
+        host_capture = 100.0 + i / fps
+        device_ts = (host_capture - offset) * (1 + drift_ppm * 1e-6)
+        host_receive = host_capture + 0.010 + rng.exponential(0.008)
+        errors.append(clock.observe(device_ts, host_receive) - host_capture)
+    return np.array(errors)
+
+def test_estimates_drift_and_capture_time():
+    clock = ClockSync(window=512, latency_floor=0.010)
+    errors = simulate(clock)
+    assert clock.drift_ppm == pytest.approx(-80.0, abs=10.0)
+    # Once warmed up, corrected capture times are within a millisecond or two
+    assert np.abs(errors[-300:]).max() < 0.002
+
+def test_latency_and_wall_time():
+    clock = ClockSync(latency_floor=0.010, host_clock=lambda: 200.0, wall_clock=lambda: 1_700_000_000.0)
+    simulate(clock, seconds=10)
+    stats = clock.stats()
+    # Without host-synced latencies only the relative receive delay is known
+    assert stats['latency_ms']['p50'] is None
+    assert stats['relative_delay_ms']['p50'] > 10.0
+    device_ts = (150.0 - 1234.5) * (1 + 80e-6)
+    assert clock.latency(device_ts) == pytest.approx(50.0, abs=0.005)
+    assert clock.to_wall(device_ts) == pytest.approx(1_700_000_000.0 - 50.0, abs=0.005)
+
+def test_end_to_end_latency_from_observations():
+    clock = ClockSync(latency_floor=0.0)
+    for i in range(100):
+        clock.observe(i / 30, 100.0 + i / 30 + 0.020, latency=0.035 + (i % 10) / 1000)
+    stats = clock.stats()
+    assert stats['latency_ms']['p50'] == pytest.approx(39.5, abs=0.5)
+    assert stats['latency_ms']['max'] == pytest.approx(44.0)
+    # The fit absorbs the constant transport delay: relative delay is near zero
+    assert stats['relative_delay_ms']['p95'] < 1.0
+
+def test_requires_observations():
+    with pytest.raises(RuntimeError):
+        ClockSync().to_host(1.0)
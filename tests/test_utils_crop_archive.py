@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+from src.utils.crop_archive import CropArchive, expand_box, preview_to_full
+
+def test_preview_is_center_crop_of_full_frame():
+    # A square preview of a 1080p frame covers the central 1080x1080 region
+    assert preview_to_full((0, 0, 1, 1), (304, 304), (1920, 1080)) == (420, 0, 1500, 1080)
+    assert preview_to_full((0.5, 0.5, 0.75, 1.0), (304, 304), (1920, 1080)) == (960, 540, 1230, 1080)
+    assert preview_to_full((0, 0, 1, 1), (304, 304), (1920, 1080), keep_aspect=False) == (0, 0, 1920, 1080)
+
+def test_expand_box_adds_margin_and_clips():
+    assert expand_box((100, 100, 200, 200), (1920, 1080), margin=0.1) == (90, 90, 210, 210)
+    assert expand_box((0, 0, 10, 10), (1920, 1080), margin=0, min_size=64) == (0, 0, 37, 37)
+    assert expand_box((1900, 1076, 1920, 1080), (1920, 1080), margin=0, min_size=10) == (1900, 1073, 1920, 1080)
+
+def test_archive_writes_crops_and_index(tmp_path):
+    frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    frame[100:200, 300:500] = 255
+    archive = CropArchive(tmp_path / 'crops')
+    record = archive.add(frame, (300, 100, 500, 200), {'sequence': 12, 'label_name': 'person', 'confidence': 0.9})
+    archive.close()
+
+    assert record['size'] == [200, 100]
+    assert (tmp_path / 'crops' / record['file']).stat().st_size == archive.bytes_written
+    index = CropArchive.read_index(tmp_path / 'crops')
+    assert index == [record]
+    assert index[0]['file'].startswith('00000012_')
@@ -0,0 +1,118 @@
+import multiprocessing
+import subprocess
+import sys
+import uuid
+import numpy as np
+import pytest
+from src.utils.frame_bus import FrameBusReader, FramePublisher
+
+@pytest.fixture
+def bus_name():
+    return f"oakd-test-{uuid.uuid4().hex[:8]}"
+
+def test_roundtrip_is_zero_copy(bus_name):
+    publisher = FramePublisher(bus_name, slot_bytes=48 * 64 * 3, slot_count=4)
+    reader = FrameBusReader(bus_name)
+    try:
+        assert reader.next(timeout=0.01) is None
+        frame = np.random.default_rng(0).integers(0, 255, (48, 64, 3), dtype=np.uint8)
+        publisher.publish(frame, sequence=7, device_timestamp=1.5, host_timestamp=100.0)
+
+        received = reader.next(timeout=1)
+        assert received.sequence == 7
+        assert received.device_timestamp == 1.5
+        assert received.host_timestamp == 100.0
+        assert received.array.dtype == np.uint8
+        np.testing.assert_array_equal(received.array, frame)
+        assert not received.array.flags.owndata
+        assert received.valid()
+        del received
+    finally:
+        reader.close()
+        publisher.close()
+
+def test_overwritten_slot_is_invalid_and_slow_reader_skips(bus_name):
+    publisher = FramePublisher(bus_name, slot_bytes=16 * 2, slot_count=4)
+    reader = FrameBusReader(bus_name)
+    try:
+        publisher.publish(np.full(16, 1, dtype=np.uint16))
+        first = reader.next(timeout=1)
+        for i in range(2, 11):
+            publisher.publish(np.full(16, i, dtype=np.uint16))
+        # The producer never waited; the first slot has been reused
+        assert not first.valid()
+
+        received = reader.next(timeout=1)
+        assert received.index > 2
+        assert reader.missed == received.index - 2
+        assert reader.latest().array[0] == 10
+        del first, received
+    finally:
+        reader.close()
+        publisher.close()
+
+def test_rejects_oversized_frames(bus_name):
+    publisher = FramePublisher(bus_name, slot_bytes=8)
+    try:
+        with pytest.raises(ValueError):
+            publisher.publish(np.zeros(16, dtype=np.uint8))
+    finally:
+        publisher.close()
+
+def _subscriber(name, results):
+    reader = FrameBusReader(name)
+    frame = reader.next(timeout=5)
+    results.put((frame.sequence, int(frame.array.sum())))
+    del frame
+    reader.close()
+
+def test_reader_in_another_process(bus_name):
+    publisher = FramePublisher(bus_name, slot_bytes=100, slot_count=4)
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=_subscriber, args=(bus_name, results))
+    process.start()
+    try:
+        sequence = 0
+        while results.empty() and process.is_alive():
+            sequence += 1
+            publisher.publish(np.ones(100, dtype=np.uint8), sequence=sequence)
+            process.join(0.01)
+        received_sequence, total = results.get(timeout=5)
+        assert 1 <= received_sequence <= sequence
+        assert total == 100
+    finally:
+        process.join(5)
+        publisher.close()
+
+def test_reclaims_segment_only_from_dead_producer(bus_name):
+    publisher = FramePublisher(bus_name, slot_bytes=16)
+    try:
+        # The producer is alive: its segment is not taken over
+        with pytest.raises(FileExistsError):
+            FramePublisher(bus_name, slot_bytes=16)
+
+        exited = subprocess.Popen([sys.executable, "-c", "pass"])
+        exited.wait()
+        publisher._header["pid"] = exited.pid
+        # Crash: the segment stays behind with its producer gone
+        del publisher._header, publisher._slots, publisher._data
+        publisher.shm.close()
+        publisher.shm = None
+
+        publisher = FramePublisher(bus_name, slot_bytes=32)
+        publisher.publish(np.zeros(32, dtype=np.uint8))
+        assert publisher.published == 1
+    finally:
+        publisher.close()
+
+def test_latest_gives_up_on_a_slot_stuck_mid_write(bus_name):
+    publisher = FramePublisher(bus_name, slot_bytes=16)
+    reader = FrameBusReader(bus_name)
+    try:
+        publisher.publish(np.zeros(16, dtype=np.uint8))
+        publisher._slots[0]["lock"] = 3  # As if the producer died while writing
+        assert reader.latest(retries=5) is None
+    finally:
+        reader.close()
+        publisher.close()
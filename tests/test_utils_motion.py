@@ -0,0 +1,53 @@
+import numpy as np
+from src.utils.motion import MotionGate
+
+def frame(value, shape=(400, 640, 3), dtype=np.uint8):
+    return np.full(shape, value, dtype=dtype)
+
+def test_static_scene_is_decimated_to_keepalive():
+    gate = MotionGate(hold_frames=3, keepalive_seconds=1.0)
+    passed = [gate.update(frame(100), now=i / 30) for i in range(90)]
+    # First frame plus hold period, then one frame per keep-alive interval
+    assert sum(passed) < 10
+    assert passed[0]
+    assert sum(passed[30:60]) == 1
+
+def test_motion_reactivates_with_hysteresis():
+    gate = MotionGate(hold_frames=3, keepalive_seconds=100.0)
+    for i in range(10):
+        gate.update(frame(100), now=i)
+    assert not gate.active
+
+    assert gate.update(frame(200), now=11)
+    assert gate.active
+    # Stays active through the hold period after motion stops
+    results = [gate.update(frame(200), now=12 + i) for i in range(40)]
+    assert results[0]
+    assert not gate.active
+
+def test_repeat_follows_last_decision():
+    gate = MotionGate(hold_frames=1, keepalive_seconds=100.0)
+    assert gate.update(frame(100), now=0)
+    assert gate.repeat()
+    for i in range(5):
+        gate.update(frame(100), now=1 + i)
+    assert not gate.repeat()
+    assert gate.frames_seen == 8
+    assert gate.frames_passed == 2
+
+def test_depth_frames():
+    gate = MotionGate()
+    gate.update(frame(1000, shape=(400, 640), dtype=np.uint16), now=0)
+    assert gate.score(frame(1000, shape=(400, 640), dtype=np.uint16)) < 0.01
+    assert gate.score(frame(4000, shape=(400, 640), dtype=np.uint16)) > 0.1
+
+def test_report():
+    gate = MotionGate(hold_frames=1, keepalive_seconds=100.0)
+    for i in range(10):
+        if gate.update(frame(100), now=i):
+            gate.add_processing_time(0.01)
+    report = gate.report(bytes_written=1000)
+    assert report['frames_seen'] == 10
+    assert report['frames_skipped'] == 10 - report['frames_processed']
+    assert report['cpu_seconds_saved'] > 0
+    assert report['bytes_saved'] > 0
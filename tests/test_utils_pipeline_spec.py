@@ -0,0 +1,73 @@
+import copy
+import pytest
+from src.utils.config import ConfigManager
+from src.utils.pipeline_spec import (
+    PipelineSpecError, compile_spec, resolve_spec, validate_spec
+)
+
+@pytest.fixture
+def config():
+    return copy.deepcopy(ConfigManager.DEFAULT_CONFIG)
+
+@pytest.mark.parametrize('name', ['preview', 'record', 'detection'])
+def test_default_specs_are_valid(config, name):
+    plan = validate_spec(resolve_spec(config['pipelines'][name], config))
+    assert plan['nodes'] and plan['links']
+
+def test_config_file_overrides_part_of_a_spec(tmp_path):
+    path = tmp_path / 'config.yml'
+    path.write_text("pipelines: {detection: {nodes: {camera: {fps: 15}}}}\n")
+    loaded = ConfigManager.load_config(str(path))
+    defaults = ConfigManager.DEFAULT_CONFIG['pipelines']['detection']
+    assert loaded['pipelines']['detection']['nodes']['camera']['fps'] == 15
+    assert loaded['pipelines']['detection']['links'] == defaults['links']
+    assert set(loaded['pipelines']['detection']['nodes']) == set(defaults['nodes'])
+
+def test_references_and_conditional_links(config):
+    spec = config['pipelines']['detection']
+    config['detection']['preview_size'] = [320, 320]
+    config['camera']['fps'] = 15
+    resolved = resolve_spec(spec, config)
+    # The camera runs at the rate the detection video is written at
+    assert resolved['nodes']['camera']['fps'] == 15
+    assert resolved['nodes']['camera']['preview_size'] == [320, 320]
+    assert ['nn.passthrough', 'xout_rgb.input'] in resolved['links']
+    assert ['camera.preview', 'xout_rgb.input'] not in resolved['links']
+
+    config['detection']['sync_nn'] = False
+    resolved = resolve_spec(spec, config)
+    assert ['camera.preview', 'xout_rgb.input'] in resolved['links']
+    assert ['nn.passthrough', 'xout_rgb.input'] not in resolved['links']
+
+def test_validation_reports_every_error():
+    spec = {
+        'nodes': {
+            'camera': {'type': 'ColorCamera', 'resolution': 'THE_9000_P', 'zoom': 2},
+            'left': {'type': 'MonoCamera', 'socket': 'name'},
+            'mystery': {'type': 'Teleporter'},
+            'xout_a': {'type': 'XLinkOut', 'stream': 'rgb'},
+            'xout_b': {'type': 'XLinkOut', 'stream': 'rgb'},
+            'xout_c': {'type': 'XLinkOut'},
+        },
+        'links': [
+            ['camera.preview', 'xout_a.input'],
+            ['camera.video', 'xout_a.input'],
+            ['camera.depth', 'xout_b.input'],
+            ['camera.preview', 'nowhere.input'],
+        ],
+    }
+    with pytest.raises(PipelineSpecError) as error:
+        validate_spec(spec)
+    message = str(error.value)
+    for expected in ["'THE_9000_P'", "'name'", "'zoom'", 'Teleporter', "missing required property 'stream'",
+                     'input already linked', "no output 'depth'", 'unknown node', "'rgb' is used more than once"]:
+        assert expected in message
+
+def test_unknown_reference(config):
+    with pytest.raises(PipelineSpecError, match='camera.nope'):
+        resolve_spec({'nodes': {'c': {'type': 'ColorCamera', 'fps': '$camera.nope'}}}, config)
+
+def test_compile_spec_builds_every_node(config):
+    spec = config['pipelines']['record']
+    pipeline, nodes = compile_spec(spec, config)
+    assert set(nodes) == set(spec['nodes'])
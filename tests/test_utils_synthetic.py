@@ -0,0 +1,14 @@
+from src.utils.synthetic import SyntheticDevice, SyntheticFrameSource
+
+def test_synthetic_device_streams():
+    source = SyntheticFrameSource(rgb_size=(64, 48), depth_size=(32, 20))
+    with SyntheticDevice(source=source, fps=0) as device:
+        rgb = device.getOutputQueue(name='rgb').get()
+        depth = device.getOutputQueue(name='depth').get()
+        detections = device.getOutputQueue(name='detections').get()
+
+    assert rgb.getCvFrame().shape == (48, 64, 3)
+    assert depth.getFrame().shape == (20, 32)
+    assert rgb.getSequenceNum() == depth.getSequenceNum() == detections.getSequenceNum()
+    for detection in detections.detections:
+        assert 0 < detection.label < 21
@@ -0,0 +1,76 @@
+import time
+import shutil
+import pytest
+import cv2
+import numpy as np
+from src.utils.video_writer import FFmpegVideoWriter, OpenCVVideoWriter, benchmark_writers, create_video_writer
+
+FRAMES = [np.full((48, 64, 3), i * 10, dtype=np.uint8) for i in range(10)]
+
+def test_default_backend_is_opencv(tmp_path):
+    path = tmp_path / 'out.mp4'
+    writer = create_video_writer(path, 30, (64, 48))
+    assert isinstance(writer, OpenCVVideoWriter)
+    assert writer.isOpened()
+    for frame in FRAMES:
+        writer.write(frame)
+    writer.release()
+
+    capture = cv2.VideoCapture(str(path))
+    assert int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) == len(FRAMES)
+    capture.release()
+
+def test_unknown_backend(tmp_path):
+    with pytest.raises(ValueError):
+        create_video_writer(tmp_path / 'out.mp4', 30, (64, 48), {'backend': 'gstreamer'})
+
+def test_missing_ffmpeg_binary(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        FFmpegVideoWriter(tmp_path / 'out.mp4', 30, (64, 48), binary='no-such-ffmpeg')
+
+@pytest.mark.skipif(shutil.which('ffmpeg') is None, reason='ffmpeg not installed')
+def test_ffmpeg_writer(tmp_path):
+    path = tmp_path / 'out.mp4'
+    writer = create_video_writer(path, 30, (64, 48), {'backend': 'ffmpeg', 'ffmpeg': {'preset': 'ultrafast'}})
+    for frame in FRAMES:
+        writer.write(frame)
+    with pytest.raises(ValueError):
+        writer.write(np.zeros((10, 10, 3), dtype=np.uint8))
+    writer.release()
+    assert path.stat().st_size > 0
+
+def test_benchmark_skips_unavailable_backends():
+    results = benchmark_writers({
+        'opencv-mp4v': {'backend': 'opencv', 'fourcc': 'mp4v'},
+        'ffmpeg': {'backend': 'ffmpeg', 'ffmpeg': {'binary': 'no-such-ffmpeg'}},
+    }, FRAMES)
+    assert [r['name'] for r in results] == ['opencv-mp4v']
+    assert results[0]['bytes'] > 0
+
+def fake_ffmpeg(tmp_path, body):
+    import stat
+    import sys
+    binary = tmp_path / 'fake-ffmpeg'
+    binary.write_text(f'#!{sys.executable}\nimport sys, time\n{body}\n')
+    binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+    return str(binary)
+
+def test_ffmpeg_chatty_stderr_does_not_block(tmp_path):
+    # Far more stderr than a pipe buffer holds, then consume all input
+    binary = fake_ffmpeg(tmp_path, "sys.stderr.write('x' * 1_000_000)\nsys.stdin.buffer.read()")
+    writer = FFmpegVideoWriter(tmp_path / 'out.mp4', 30, (64, 48), binary=binary)
+    for _ in range(50):
+        writer.write(np.zeros((48, 64, 3), dtype=np.uint8))
+    writer.release()
+    assert writer.error is None
+
+def test_ffmpeg_failure_after_start_is_reported(tmp_path):
+    binary = fake_ffmpeg(tmp_path, "time.sleep(0.2)\nsys.stderr.write('Unknown encoder')\nsys.exit(1)")
+    writer = FFmpegVideoWriter(tmp_path / 'out.mp4', 30, (64, 48), binary=binary)
+    assert writer.isOpened()
+    with pytest.raises(IOError, match='Unknown encoder'):
+        for _ in range(1000):
+            writer.write(np.zeros((48, 64, 3), dtype=np.uint8))
+            time.sleep(0.01)
+    assert not writer.isOpened()
+    writer.release()